@@ -3,7 +3,9 @@ from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
-from app.services.audio_extractor_advanced import AdvancedFfmpegAudioExtractor
+from fastapi import Request
+
+from app.services.audio_extractor import AudioExtractor, create_audio_extractor
 from app.services.transcriber import LocalWhisperTranscriber
 from app.services.analyzer import SpeechAnalyzer
 from app.services.gigachat import GigaChatClient
@@ -30,9 +32,9 @@ def get_cache_manager() -> TwoLevelCache:
 
 
 @lru_cache(maxsize=1)
-def get_audio_extractor() -> AdvancedFfmpegAudioExtractor:
+def get_audio_extractor() -> AudioExtractor:
     """Создает экстрактор аудио"""
-    return AdvancedFfmpegAudioExtractor()
+    return create_audio_extractor()
 
 
 @lru_cache(maxsize=1)
@@ -107,8 +109,21 @@ def get_advanced_pipeline():
             transcriber=transcriber,
             analyzer=analyzer,
             gigachat_client=gigachat_client,
-            include_timings=True
+            include_timings=True,
         )
     except ImportError as e:
         logger.error(f"Не удалось создать расширенный пайплайн: {e}")
         raise
+
+
+# Доступ к сервисам, созданным в lifespan (app.state), без Depends.
+# Если lifespan не запускался (скрипты, TestClient без контекста),
+# сервис создается лениво через фабрики выше.
+def pipeline_from_state(request: Request) -> SpeechAnalysisPipeline:
+    """Возвращает пайплайн анализа из состояния приложения"""
+    return getattr(request.app.state, "pipeline", None) or get_speech_pipeline()
+
+
+def advanced_pipeline_from_state(request: Request):
+    """Возвращает расширенный пайплайн из состояния приложения"""
+    return getattr(request.app.state, "advanced_pipeline", None) or get_advanced_pipeline()
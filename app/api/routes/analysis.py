@@ -1,12 +1,16 @@
 import logging
+from tempfile import SpooledTemporaryFile
 from typing import List
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status
+from urllib.parse import unquote
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Response, status
 
-from app.api.deps import get_speech_pipeline, get_advanced_pipeline
+from app.api.deps import pipeline_from_state, advanced_pipeline_from_state
 from app.models.analysis import AnalysisResult
 from app.models.timed_models import TimedAnalysisResult
+from app.core.config import settings
 from app.core.exceptions import (
     FileValidationError,
+    FileTooLargeError,
     TranscriptionError,
     AnalysisError,
 )
@@ -14,9 +18,81 @@ from app.core.exceptions import (
 router = APIRouter(prefix="/api", tags=["analysis"])
 logger = logging.getLogger(__name__)
 
+# Поля публичного ответа /analyze (EnhancedAnalysisResult из пайплайна шире)
+_ANALYSIS_RESULT_FIELDS = frozenset(AnalysisResult.model_fields)
+
+# Порог, после которого тело /analyze/raw сбрасывается на диск (как у
+# multipart-парсера Starlette)
+_RAW_UPLOAD_SPOOL_MAX_SIZE = 1024 * 1024
+
+
+async def _receive_raw_upload(request: Request) -> UploadFile:
+    """
+    Принимает тело запроса как файл без разбора multipart.
+
+    Порции из request.stream() пишутся в SpooledTemporaryFile через
+    UploadFile.write (запись на диск — в пуле потоков); лимит размера
+    проверяется на лету, даже если Content-Length не передан.
+    """
+    filename = unquote(request.headers.get("x-filename", ""))
+    upload = UploadFile(
+        file=SpooledTemporaryFile(max_size=_RAW_UPLOAD_SPOOL_MAX_SIZE),
+        size=0,
+        filename=filename or None,
+        headers=request.headers,
+    )
+    max_size_bytes = settings.max_file_size_bytes
+    try:
+        async for chunk in request.stream():
+            if upload.size + len(chunk) > max_size_bytes:
+                raise FileTooLargeError(
+                    file_size_mb=(upload.size + len(chunk)) / (1024 * 1024),
+                    max_size_mb=settings.max_file_size_mb
+                )
+            await upload.write(chunk)
+        await upload.seek(0)
+    except BaseException:
+        await upload.close()
+        raise
+    return upload
+
+
+async def _analyze_upload_response(request: Request, file: UploadFile) -> Response:
+    """
+    Базовый анализ загрузки общим пайплайном; ошибки превращаются в HTTPException.
+
+    Один проход сериализации в JSON (pydantic-core) только по полям AnalysisResult.
+    """
+    pipeline = pipeline_from_state(request)
+
+    try:
+        result = await pipeline.analyze_upload(file)
+        logger.info(f"Базовый анализ завершен для {file.filename}")
+        return Response(
+            content=result.model_dump_json(include=_ANALYSIS_RESULT_FIELDS),
+            media_type="application/json",
+        )
+
+    except FileValidationError as e:
+        logger.warning(f"Ошибка валидации файла {file.filename}: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    except (TranscriptionError, AnalysisError) as e:
+        logger.error(f"Ошибка обработки {file.filename}: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    except Exception as e:
+        logger.error(f"Неожиданная ошибка для {file.filename}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Внутренняя ошибка сервера при обработке файла"
+        )
+
 
 @router.post(
     "/analyze",
+    # response_model — для схемы в OpenAPI; роут возвращает готовый Response,
+    # поэтому FastAPI не валидирует результат повторно
     response_model=AnalysisResult,
     summary="Базовый анализ видеофайла с речью",
     description="""
@@ -32,42 +108,59 @@ logger = logging.getLogger(__name__)
     - Транскрипт текста
     """,
     responses={
-        200: {"description": "Анализ успешно выполнен"},
+        200: {"model": AnalysisResult, "description": "Анализ успешно выполнен"},
         400: {"description": "Некорректный файл или формат"},
         413: {"description": "Файл слишком большой"},
         500: {"description": "Ошибка при обработке файла"},
     }
 )
 async def analyze_video(
+    request: Request,
     file: UploadFile = File(...,
                             description="Видеофайл для анализа (до 100 MB)"),
-    pipeline=Depends(get_speech_pipeline),
-) -> AnalysisResult:
+) -> Response:
     """
     Анализирует загруженное видео и возвращает основные результаты анализа речи.
     Подходит для быстрого анализа без детализированных таймингов.
     """
     logger.info(f"Получен запрос на базовый анализ файла: {file.filename}")
+    return await _analyze_upload_response(request, file)
 
-    try:
-        result = await pipeline.analyze_upload(file)
-        logger.info(f"Базовый анализ завершен для {file.filename}")
-        return result
 
-    except FileValidationError as e:
-        logger.warning(f"Ошибка валидации файла {file.filename}: {e.detail}")
-        raise HTTPException(status_code=e.status_code, detail=e.detail)
+@router.post(
+    "/analyze/raw",
+    response_model=AnalysisResult,
+    summary="Базовый анализ видео, переданного телом запроса",
+    description="""
+    То же, что /analyze, но видео передается телом запроса целиком
+    (application/octet-stream), без multipart. Имя файла — в заголовке
+    X-Filename (URL-кодированное), по его расширению проверяется формат.
 
-    except (TranscriptionError, AnalysisError) as e:
-        logger.error(f"Ошибка обработки {file.filename}: {e.detail}")
+    Подходит для больших файлов и клиентов, отличных от браузера:
+    тело пишется во временный файл без разбора multipart.
+    """,
+    responses={
+        200: {"model": AnalysisResult, "description": "Анализ успешно выполнен"},
+        400: {"description": "Некорректный файл или формат"},
+        413: {"description": "Файл слишком большой"},
+        500: {"description": "Ошибка при обработке файла"},
+    }
+)
+async def analyze_video_raw(request: Request) -> Response:
+    """
+    Анализирует видео из тела запроса и возвращает основные результаты анализа речи.
+    """
+    try:
+        file = await _receive_raw_upload(request)
+    except FileValidationError as e:
+        logger.warning(f"Ошибка приема файла: {e.detail}")
         raise HTTPException(status_code=e.status_code, detail=e.detail)
 
-    except Exception as e:
-        logger.error(f"Неожиданная ошибка для {file.filename}: {e}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Внутренняя ошибка сервера при обработке файла"
-        )
+    logger.info(f"Получен запрос на базовый анализ файла (raw): {file.filename}")
+    try:
+        return await _analyze_upload_response(request, file)
+    finally:
+        await file.close()
 
 
 @router.post(
@@ -97,9 +190,9 @@ async def analyze_video(
     }
 )
 async def analyze_video_detailed(
+    request: Request,
     file: UploadFile = File(...,
                             description="Видеофайл для детализированного анализа"),
-    pipeline=Depends(get_advanced_pipeline),
 ) -> TimedAnalysisResult:
     """
     Анализирует загруженное видео и возвращает детализированные результаты
@@ -107,6 +200,7 @@ async def analyze_video_detailed(
 
     Идеально для создания интерактивных временных шкал и подробных отчетов.
     """
+    pipeline = advanced_pipeline_from_state(request)
     logger.info(f"Получен запрос на детализированный анализ файла: {file.filename}")
 
     try:
@@ -1,6 +1,6 @@
-from typing import Optional, List
+from typing import Optional, FrozenSet
 from pydantic_settings import BaseSettings
-from pydantic import Field, SecretStr, field_validator
+from pydantic import Field, SecretStr, ValidationInfo, field_validator
 import json
 
 
@@ -9,6 +9,8 @@ class Settings(BaseSettings):
     
     # FFmpeg configuration
     ffmpeg_path: str = Field(default="ffmpeg", alias="FFMPEG_PATH")
+    # Декодирование аудио через PyAV в процессе (ffmpeg остается запасным вариантом)
+    pyav_decoding_enabled: bool = Field(default=True, alias="PYAV_DECODING_ENABLED")
 
     # Настройки локального Whisper (faster-whisper)
     whisper_model: str = Field(
@@ -17,8 +19,27 @@ class Settings(BaseSettings):
     whisper_device: str = Field(
         default="cpu", alias="WHISPER_DEVICE"
     )
+    # "auto" — выбор по устройству (см. resolve_whisper_compute_type)
     whisper_compute_type: str = Field(
-        default="int8", alias="WHISPER_COMPUTE_TYPE"
+        default="auto", alias="WHISPER_COMPUTE_TYPE", validate_default=True
+    )
+    # Размер батча BatchedInferencePipeline (по умолчанию 8 на CPU, 16 на GPU;
+    # 1 — последовательная транскрибация без батчей)
+    whisper_batch_size: Optional[int] = Field(
+        default=None, alias="WHISPER_BATCH_SIZE", validate_default=True
+    )
+    # Число параллельных транскрибаций на одной копии модели (потоки
+    # CTranslate2 разделяют веса) — вместо отдельной модели в каждом воркере uvicorn
+    whisper_num_workers: int = Field(
+        default=1, ge=1, alias="WHISPER_NUM_WORKERS"
+    )
+    # Потоков на одну транскрибацию на CPU (0 — значение CTranslate2 по умолчанию)
+    whisper_cpu_threads: int = Field(
+        default=0, ge=0, alias="WHISPER_CPU_THREADS"
+    )
+    # Прогрев модели на тишине при старте приложения
+    whisper_warmup_enabled: bool = Field(
+        default=True, alias="WHISPER_WARMUP_ENABLED"
     )
 
     # Настройки GigaChat API (согласно документации)
@@ -49,14 +70,29 @@ class Settings(BaseSettings):
         default="GIGACHAT_API_PERS",
         alias="GIGACHAT_SCOPE"
     )
+    # Пробный запрос к модели при старте (прогрев соединения)
+    gigachat_warmup_enabled: bool = Field(
+        default=False, alias="GIGACHAT_WARMUP_ENABLED"
+    )
 
     # Настройки валидации файлов
     max_file_size_mb: int = Field(
         default=100, alias="MAX_FILE_SIZE_MB"
     )
-    allowed_video_extensions: List[str] = Field(
-        default=[".mp4", ".mov", ".avi", ".mkv",
-                 ".webm", ".flv", ".wmv", ".m4v"],
+    # Загрузки до этого размера декодируются из памяти без временного
+    # видеофайла (0 — всегда сохранять на диск)
+    upload_spool_max_mb: int = Field(
+        default=32, alias="UPLOAD_SPOOL_MAX_MB"
+    )
+    # Порция копирования загрузки во временный файл: меньше системных
+    # вызовов на больших файлах ценой буфера такого размера на запрос
+    upload_chunk_size_mb: int = Field(
+        default=8, ge=1, le=64, alias="UPLOAD_CHUNK_SIZE_MB"
+    )
+    # frozenset: проверка расширения загрузки — O(1)
+    allowed_video_extensions: FrozenSet[str] = Field(
+        default=frozenset({".mp4", ".mov", ".avi", ".mkv",
+                           ".webm", ".flv", ".wmv", ".m4v"}),
         alias="ALLOWED_VIDEO_EXTENSIONS"
     )
 
@@ -112,6 +148,11 @@ class Settings(BaseSettings):
         "case_sensitive": False,
     }
 
+    @property
+    def max_file_size_bytes(self) -> int:
+        """Максимальный размер загрузки в байтах"""
+        return self.max_file_size_mb * 1024 * 1024
+
     @field_validator("max_file_size_mb")
     def validate_max_file_size(cls, v):
         if v <= 0:
@@ -120,11 +161,38 @@ class Settings(BaseSettings):
             raise ValueError("MAX_FILE_SIZE_MB cannot exceed 1024 (1GB)")
         return v
 
+    @field_validator("whisper_compute_type")
+    def resolve_whisper_compute_type(cls, v, info: ValidationInfo):
+        """
+        Подбирает тип вычислений Whisper под устройство, если он не задан явно.
+
+        На CPU динамический int8 — самый быстрый вариант. На GPU чистый int8
+        часто медленнее float16: веса в int8 выигрывают только вместе с
+        fp16-активациями (int8_float16), которые остаются на тензорных ядрах.
+        """
+        if v != "auto":
+            return v
+        device = info.data.get("whisper_device", "cpu")
+        if device == "cpu":
+            return "int8"
+        if device == "cuda":
+            return "int8_float16"
+        # Для device=auto выбор остается за ctranslate2
+        return v
+
+    @field_validator("whisper_batch_size")
+    def resolve_whisper_batch_size(cls, v, info: ValidationInfo):
+        if v is None:
+            return 8 if info.data.get("whisper_device", "cpu") == "cpu" else 16
+        if v < 1:
+            raise ValueError("WHISPER_BATCH_SIZE must be positive")
+        return v
+
     @field_validator("allowed_video_extensions", mode="before")
     def parse_allowed_extensions(cls, v):
-        """Парсит значение в список расширений"""
+        """Парсит значение в множество расширений"""
         if v is None:
-            return cls.__fields__["allowed_video_extensions"].default
+            return cls.model_fields["allowed_video_extensions"].default
 
         if isinstance(v, str):
             try:
@@ -140,14 +208,14 @@ class Settings(BaseSettings):
                 v = [ext.strip() for ext in v.split(",") if ext.strip()]
 
         # Убедимся, что расширения начинаются с точки и в нижнем регистре
-        if isinstance(v, list):
-            validated = []
+        if isinstance(v, (list, tuple, set, frozenset)):
+            validated = set()
             for ext in v:
                 if isinstance(ext, str):
                     if not ext.startswith("."):
                         ext = f".{ext}"
-                    validated.append(ext.lower())
-            return validated
+                    validated.add(ext.lower())
+            return frozenset(validated)
 
         return v
 
@@ -2,6 +2,8 @@
 Кастомные исключения для приложения.
 """
 
+from typing import Iterable
+
 from fastapi import HTTPException, status
 
 
@@ -33,10 +35,10 @@ class FileTooLargeError(FileValidationError):
 class UnsupportedFileTypeError(FileValidationError):
     """Неподдерживаемый тип файла"""
 
-    def __init__(self, file_extension: str, allowed_extensions: list):
+    def __init__(self, file_extension: str, allowed_extensions: Iterable[str]):
         detail = (
             f"File type '{file_extension}' is not supported. "
-            f"Allowed types: {', '.join(allowed_extensions)}"
+            f"Allowed types: {', '.join(sorted(allowed_extensions))}"
         )
         super().__init__(detail=detail)
 
@@ -48,6 +50,13 @@ class TranscriptionError(SpeechCoachException):
         super().__init__(detail=detail, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class AudioExtractionError(SpeechCoachException):
+    """Ошибка извлечения аудио из видео"""
+
+    def __init__(self, detail: str = "Failed to extract audio"):
+        super().__init__(detail=detail, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class AnalysisError(SpeechCoachException):
     """Ошибка анализа"""
 
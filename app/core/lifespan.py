@@ -1,14 +1,43 @@
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Границы интервала фонового обновления токена GigaChat
+_TOKEN_REFRESH_MIN_SEC = 30.0
+_TOKEN_REFRESH_MAX_SEC = 25 * 60
+
+
+def _token_refresh_delay(expires_in: Optional[float]) -> float:
+    """Пауза до обновления токена: 80% оставшегося срока в границах [30 с, 25 мин]"""
+    remaining = expires_in or 0.0
+    return min(max(remaining * 0.8, _TOKEN_REFRESH_MIN_SEC), _TOKEN_REFRESH_MAX_SEC)
+
+
+async def _refresh_gigachat_token(client) -> None:
+    """Обновляет токен GigaChat на 80% его срока жизни, чтобы запросы не ждали авторизацию"""
+    while True:
+        await asyncio.sleep(_token_refresh_delay(client.token_expires_in()))
+        try:
+            await client.authenticate(force=True)
+            logger.debug("🔑 Токен GigaChat обновлен")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️  Не удалось обновить токен GigaChat: {e}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Простой lifespan без фоновых задач.
+    Lifespan приложения: создает сервисы в app.state при старте
+    и освобождает их при завершении.
     Uvicorn сам обрабатывает сигналы завершения.
     """
     logger.info("🚀 Запуск Speech Coach API")
@@ -20,22 +49,43 @@ async def lifespan(app: FastAPI):
         # Быстрая инициализация
         logger.info("⏳ Инициализация...")
 
-        # Проверка доступности модулей
+        # Создаем сервисы до приема запросов: загрузка модели Whisper
+        # происходит при старте, а не на первом запросе
         try:
             from app.api.deps import get_transcriber
             transcriber = get_transcriber()
+            app.state.transcriber = transcriber
             logger.info(f"✅ Transcriber initialization: model_available={transcriber._model_available}")
+
+            if settings.whisper_warmup_enabled and transcriber._model_available:
+                warmup_sec = await asyncio.to_thread(transcriber.warmup)
+                logger.info(f"🔥 Whisper прогрет за {warmup_sec:.2f}s")
         except Exception as e:
             logger.warning(f"⚠️  Transcriber initialization failed: {e}")
 
-        # Ленивая инициализация GigaChat (при первом запросе)
+        # Пайплайны анализа (роуты берут их из app.state)
         try:
-            from app.core.config import settings
-            if settings.gigachat_enabled:
-                logger.info(
-                    "🔧 GigaChat настроен, будет инициализирован при первом запросе")
-        except:
-            logger.debug("GigaChat не настроен")
+            from app.api.deps import get_gigachat_client, get_speech_pipeline, get_advanced_pipeline
+            app.state.gigachat_client = get_gigachat_client()
+            app.state.pipeline = get_speech_pipeline()
+            app.state.advanced_pipeline = get_advanced_pipeline()
+            logger.info("✅ Пайплайны анализа созданы")
+        except Exception as e:
+            logger.warning(f"⚠️  Pipeline initialization failed: {e}")
+
+        # Авторизация (или прогрев) GigaChat до приема запросов
+        gigachat_client = getattr(app.state, "gigachat_client", None)
+        if gigachat_client is not None:
+            started = time.perf_counter()
+            startup = (gigachat_client.warmup() if settings.gigachat_warmup_enabled
+                       else gigachat_client.authenticate())
+            try:
+                await startup
+                logger.info(f"🔑 GigaChat авторизован за {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                logger.warning(f"⚠️  GigaChat pre-authentication failed: {e}")
+            app.state._gigachat_refresher = asyncio.create_task(
+                _refresh_gigachat_token(gigachat_client))
 
         logger.info("✅ Приложение готово")
         yield
@@ -47,10 +97,19 @@ async def lifespan(app: FastAPI):
     finally:
         logger.info("🛑 Завершение работы...")
 
+        # Остановка фонового обновления токена GigaChat
+        refresher = getattr(app.state, '_gigachat_refresher', None)
+        if refresher is not None:
+            refresher.cancel()
+            try:
+                await refresher
+            except asyncio.CancelledError:
+                pass
+
         # Простая очистка
         try:
             # Закрытие GigaChat, если он был инициализирован
-            if hasattr(app.state, 'gigachat_client'):
+            if getattr(app.state, 'gigachat_client', None) is not None:
                 try:
                     await app.state.gigachat_client.close()
                     logger.info("🔒 GigaChat закрыт")
@@ -65,9 +124,10 @@ async def lifespan(app: FastAPI):
             import os
             import time
             import glob
+            import shutil
 
             temp_dir = tempfile.gettempdir()
-            patterns = ["tmp*.mp4", "tmp*.wav", "ffmpeg*"]
+            patterns = ["speech_*", "tmp*.mp4", "tmp*.wav", "ffmpeg*"]
 
             deleted = 0
             for pattern in patterns:
@@ -75,7 +135,10 @@ async def lifespan(app: FastAPI):
                     try:
                         # Удаляем только старые файлы (старше 1 часа)
                         if os.path.exists(filepath) and time.time() - os.path.getmtime(filepath) > 3600:
-                            os.remove(filepath)
+                            if os.path.isdir(filepath):
+                                shutil.rmtree(filepath)
+                            else:
+                                os.remove(filepath)
                             deleted += 1
                     except:
                         pass
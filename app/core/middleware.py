@@ -0,0 +1,55 @@
+"""
+ASGI-middleware приложения.
+"""
+import logging
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.exceptions import FileTooLargeError
+from app.core.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Запас на заголовки и границы multipart поверх самого файла
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Отклоняет слишком большие загрузки на анализ по Content-Length до чтения тела.
+
+    FastAPI читает тело формы до вызова зависимостей, поэтому проверка в
+    Depends уже не сэкономила бы загрузку. Middleware чистый ASGI (не
+    BaseHTTPMiddleware): остальные запросы проходят без обертки.
+    Запросы без Content-Length или с некорректным значением пропускаются —
+    их размер проверяет пайплайн при сохранении файла.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/analyze"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] == "http" and scope["method"] == "POST"
+                and scope["path"].startswith(self.path_prefix)):
+            content_length = Headers(scope=scope).get("content-length")
+            if content_length and content_length.isdigit() and \
+                    int(content_length) > settings.max_file_size_bytes + MULTIPART_OVERHEAD_BYTES:
+                exc = FileTooLargeError(
+                    file_size_mb=int(content_length) / (1024 * 1024),
+                    max_size_mb=settings.max_file_size_mb
+                )
+                logger.warning(f"Upload rejected by Content-Length: {exc.detail}")
+                response = ORJSONResponse(
+                    status_code=413,
+                    content={
+                        "detail": exc.detail,
+                        "error_type": "FileTooLargeError",
+                        "max_size_mb": settings.max_file_size_mb,
+                    },
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
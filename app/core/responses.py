@@ -0,0 +1,36 @@
+"""
+JSON-ответы с сериализацией через orjson.
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    _ORJSON_AVAILABLE = False
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse, который кодирует ответ через orjson (если установлен).
+
+    Для роутов с response_model FastAPI сам сериализует модель через
+    pydantic-core, поэтому этот класс используется для ответов, которые
+    собираются вручную (обработчики исключений, служебные страницы).
+
+    Класс намеренно не задается как default_response_class приложения:
+    любой явный класс ответа отключает в FastAPI быстрый путь
+    (model_dump_json без промежуточного dict) для роутов с response_model.
+    fastapi.responses.ORJSONResponse не используется как база, потому что
+    он объявлен устаревшим и требует orjson без запасного варианта.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if not _ORJSON_AVAILABLE:
+            return super().render(content)
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
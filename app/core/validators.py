@@ -1,6 +1,6 @@
 import mimetypes
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterable, Tuple
 import logging
 
 try:
@@ -18,7 +18,7 @@ class FileValidator:
     @staticmethod
     def validate_video_file(
         file_path: Path,
-        allowed_extensions: List[str],
+        allowed_extensions: Iterable[str],
         max_size_bytes: int
     ) -> Tuple[bool, str]:
         """
@@ -48,7 +48,7 @@ class FileValidator:
 
             # Проверка расширения
             if not any(str(file_path).lower().endswith(ext.lower()) for ext in allowed_extensions):
-                return False, f"Неподдерживаемое расширение. Разрешены: {', '.join(allowed_extensions)}"
+                return False, f"Неподдерживаемое расширение. Разрешены: {', '.join(sorted(allowed_extensions))}"
 
             # Определение MIME-типа
             if _MAGIC_AVAILABLE:
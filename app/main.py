@@ -4,7 +4,7 @@ from contextvars import ContextVar
 from pathlib import Path
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, Response
+from fastapi.responses import FileResponse, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 
@@ -12,6 +12,8 @@ from app.api.routes.health import router as health_router
 from app.api.routes.analysis import router as analysis_router
 from app.api.routes.chat import router as chat_router
 from app.core.lifespan import lifespan
+from app.core.middleware import UploadSizeLimitMiddleware
+from app.core.responses import ORJSONResponse
 from app.core.config import settings
 from app.core.logging_config import setup_logging
 from app.core.exceptions import (
@@ -57,7 +59,7 @@ app = FastAPI(
 @app.exception_handler(FileTooLargeError)
 async def file_too_large_handler(request: Request, exc: FileTooLargeError):
     logger.warning(f"File too large: {exc.detail}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": exc.detail,
@@ -70,12 +72,12 @@ async def file_too_large_handler(request: Request, exc: FileTooLargeError):
 @app.exception_handler(UnsupportedFileTypeError)
 async def unsupported_file_type_handler(request: Request, exc: UnsupportedFileTypeError):
     logger.warning(f"Unsupported file type: {exc.detail}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": exc.detail,
             "error_type": "UnsupportedFileTypeError",
-            "allowed_extensions": settings.allowed_video_extensions,
+            "allowed_extensions": sorted(settings.allowed_video_extensions),
         },
     )
 
@@ -83,7 +85,7 @@ async def unsupported_file_type_handler(request: Request, exc: UnsupportedFileTy
 @app.exception_handler(TranscriptionError)
 async def transcription_error_handler(request: Request, exc: TranscriptionError):
     logger.error(f"Transcription error: {exc.detail}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": "Ошибка распознавания речи. Убедитесь, что в видео есть четкая речь.",
@@ -96,7 +98,7 @@ async def transcription_error_handler(request: Request, exc: TranscriptionError)
 @app.exception_handler(AnalysisError)
 async def analysis_error_handler(request: Request, exc: AnalysisError):
     logger.error(f"Analysis error: {exc.detail}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": "Ошибка анализа речи. Попробуйте другой файл.",
@@ -109,7 +111,7 @@ async def analysis_error_handler(request: Request, exc: AnalysisError):
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     logger.warning(f"Validation error: {exc.errors()}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": exc.errors()},
     )
@@ -118,7 +120,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(SpeechCoachException)
 async def speech_coach_exception_handler(request: Request, exc: SpeechCoachException):
     logger.warning(f"SpeechCoachException: {exc.detail}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail, "error_type": exc.__class__.__name__},
     )
@@ -127,7 +129,7 @@ async def speech_coach_exception_handler(request: Request, exc: SpeechCoachExcep
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "detail": "Internal server error",
@@ -148,6 +150,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Ранний отказ по Content-Length для загрузок на анализ
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Request ID middleware (должен быть после CORS)
 @app.middleware("http")
 async def add_request_id_middleware(request: Request, call_next):
@@ -202,7 +207,7 @@ async def upload_page():
     html_file = template_dir / "upload.html"
     if html_file.exists():
         return FileResponse(html_file, media_type="text/html")
-    return JSONResponse({"error": "Upload page not found"}, status_code=404)
+    return ORJSONResponse({"error": "Upload page not found"}, status_code=404)
 
 @app.get("/results")
 async def results_page():
@@ -210,7 +215,7 @@ async def results_page():
     html_file = template_dir / "results.html"
     if html_file.exists():
         return FileResponse(html_file, media_type="text/html")
-    return JSONResponse({"error": "Results page not found"}, status_code=404)
+    return ORJSONResponse({"error": "Results page not found"}, status_code=404)
 
 
 @app.get("/favicon.ico")
@@ -242,7 +247,7 @@ async def documentation_page():
     html_file = template_dir / "docs.html"
     if html_file.exists():
         return FileResponse(html_file, media_type="text/html")
-    return JSONResponse({"error": "Documentation page not found"}, status_code=404)
+    return ORJSONResponse({"error": "Documentation page not found"}, status_code=404)
 
 
 @app.get("/faq")
@@ -251,7 +256,7 @@ async def faq_page():
     html_file = template_dir / "faq.html"
     if html_file.exists():
         return FileResponse(html_file, media_type="text/html")
-    return JSONResponse({"error": "FAQ page not found"}, status_code=404)
+    return ORJSONResponse({"error": "FAQ page not found"}, status_code=404)
 
 
 @app.get("/documentation/{page}")
@@ -262,4 +267,4 @@ async def documentation_subpage(page: str):
     html_file = template_dir / f"docs_{safe_name}.html"
     if html_file.exists():
         return FileResponse(html_file, media_type="text/html")
-    return JSONResponse({"error": "Documentation subpage not found"}, status_code=404)
+    return ORJSONResponse({"error": "Documentation subpage not found"}, status_code=404)
@@ -23,19 +23,12 @@ try:
     mod = import_module('app.services.audio_extractor')
     AudioExtractor = getattr(mod, 'AudioExtractor')
     FfmpegAudioExtractor = getattr(mod, 'FfmpegAudioExtractor')
+    PyAVAudioExtractor = getattr(mod, 'PyAVAudioExtractor')
 except Exception as e:
     logger.debug(f"Optional module app.services.audio_extractor not available: {e}")
     AudioExtractor = None
     FfmpegAudioExtractor = None
-
-try:
-    mod = import_module('app.services.audio_extractor_advanced')
-    AdvancedFfmpegAudioExtractor = getattr(mod, 'AdvancedFfmpegAudioExtractor')
-    TimeoutException = getattr(mod, 'TimeoutException')
-except Exception as e:
-    logger.debug(f"Optional module app.services.audio_extractor_advanced not available: {e}")
-    AdvancedFfmpegAudioExtractor = None
-    TimeoutException = None
+    PyAVAudioExtractor = None
 
 try:
     mod = import_module('app.services.transcriber')
@@ -94,8 +87,7 @@ __all__ = [
     # Optional / conditional exports (may be None)
     "AudioExtractor",
     "FfmpegAudioExtractor",
-    "AdvancedFfmpegAudioExtractor",
-    "TimeoutException",
+    "PyAVAudioExtractor",
     "Transcriber",
     "LocalWhisperTranscriber",
     "AdvancedSpeechAnalyzer",
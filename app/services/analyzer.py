@@ -1,16 +1,27 @@
+import asyncio
+import os
+from dataclasses import dataclass, field
 from typing import List, Dict, Tuple, Any, Literal, Optional
 from app.core.config import settings
 import logging
 from app.services import vad
 import re
 import wave
-import struct
+from bisect import bisect_left, insort
 import math
 from pathlib import Path
+import numpy as np
 from pydantic import BaseModel
 from app.services.gigachat import GigaChatClient
 from app.services.cache import AnalysisCache
 
+try:
+    import ahocorasick
+    _AHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    _AHOCORASICK_AVAILABLE = False
+
 from app.models.transcript import Transcript, TranscriptSegment, WordTiming
 from app.models.timed_analysis import (
     TimedFillerWord,
@@ -36,6 +47,54 @@ PAUSE_SEGMENT_TIME_TOLERANCE = settings.pause_segment_time_tolerance
 SPEECH_RATE_WINDOW_SIZE = 30.0  # секунд
 SPEECH_RATE_WINDOW_STEP = 15.0  # секунд
 
+# Канонический заголовок PCM WAV (такой пишет save_wav): 44 байта до данных
+_WAV_PCM_HEADER_BYTES = 44
+_EMPTY_PCM16 = np.empty(0, dtype="<i2")
+
+
+def _load_pcm16_mono(audio_path: Path) -> Tuple[Optional[np.ndarray], Optional[int]]:
+    """
+    Отсчеты моно PCM16 WAV и частота дискретизации.
+
+    WAV с каноническим заголовком отображается в память (np.memmap): отсчеты
+    читает page cache, без копии в буфер Python. Остальные читаются через
+    wave. Для не моно/не 16-битного WAV возвращает (None, частота).
+    """
+    with wave.open(str(audio_path), "rb") as wf:
+        n_channels, sampwidth, framerate, n_frames, *_ = wf.getparams()
+        if n_channels != 1 or sampwidth != 2:
+            return None, framerate
+        if n_frames == 0:
+            return _EMPTY_PCM16, framerate
+        if os.path.getsize(audio_path) == _WAV_PCM_HEADER_BYTES + n_frames * 2:
+            samples = np.memmap(audio_path, dtype="<i2", mode="r",
+                                offset=_WAV_PCM_HEADER_BYTES, shape=(n_frames,))
+        else:
+            samples = np.frombuffer(wf.readframes(n_frames), dtype="<i2")
+    return samples, framerate
+
+
+@dataclass
+class _PauseAudio:
+    """Данные аудио для фильтрации пауз: отсчеты PCM16 (None, если WAV не прочитан) и области речи VAD"""
+    samples: Optional[np.ndarray] = None
+    framerate: Optional[int] = None
+    vad_segments: List[Tuple[float, float]] = field(default_factory=list)
+
+
+def _load_pause_audio(audio_path: Path) -> _PauseAudio:
+    """Читает WAV и запускает VAD один раз — результат общий для всех фильтраций пауз запроса"""
+    audio = _PauseAudio()
+    try:
+        audio.samples, audio.framerate = _load_pcm16_mono(audio_path)
+    except Exception:
+        pass
+    try:
+        audio.vad_segments = vad.detect_speech_regions(audio_path, settings.use_pyannote_vad, settings.use_webrtc_vad, webrtc_mode=settings.webrtc_vad_mode, pyannote_model=settings.pyannote_model)
+    except Exception:
+        pass
+    return audio
+
 # --------------------
 # Слова-паразиты
 # --------------------
@@ -85,6 +144,49 @@ COMPILED_FILLERS: List[Tuple[str, re.Pattern]] = [
     for name, pattern in FILLER_DEFINITIONS
 ]
 
+# Паразиты-литералы вида \bслово\b (без квантификаторов)
+_LITERAL_FILLER_RE = re.compile(r"\\b([^\W\d_](?:[\w ]*\w)?)\\b")
+
+
+def _build_filler_automaton():
+    """Собирает автомат Ахо-Корасик по литеральным паразитам (если доступен pyahocorasick)"""
+    if not _AHOCORASICK_AVAILABLE:
+        return None, frozenset()
+
+    automaton = ahocorasick.Automaton()
+    names = set()
+    for name, pattern in FILLER_DEFINITIONS:
+        match = _LITERAL_FILLER_RE.fullmatch(pattern)
+        if match:
+            automaton.add_word(match.group(1), (name, len(match.group(1))))
+            names.add(name)
+    automaton.make_automaton()
+    return automaton, frozenset(names)
+
+
+# Автомат строится один раз на процесс; остальные паразиты ищутся регулярками
+FILLER_AUTOMATON, AUTOMATON_FILLER_NAMES = _build_filler_automaton()
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _find_literal_fillers(text: str) -> Dict[str, List[Tuple[int, int]]]:
+    """Находит литеральных паразитов одним проходом автомата с учетом границ слов (как \\b)"""
+    spans: Dict[str, List[Tuple[int, int]]] = {}
+    if FILLER_AUTOMATON is None:
+        return spans
+
+    for end_idx, (name, length) in FILLER_AUTOMATON.iter(text):
+        start, end = end_idx - length + 1, end_idx + 1
+        if start > 0 and _is_word_char(text[start - 1]):
+            continue
+        if end < len(text) and _is_word_char(text[end]):
+            continue
+        spans.setdefault(name, []).append((start, end))
+    return spans
+
 
 class EnhancedAnalysisResult(BaseModel):
     """Расширенный результат анализа с таймингами"""
@@ -116,25 +218,46 @@ class SpeechAnalyzer:
     ) -> EnhancedAnalysisResult:
         """
         Анализирует речь с возможностью включения таймингов.
-        """
-        # Базовый анализ
-        base_result = self._analyze_basic(transcript, audio_path)
 
-        # Дополнительный анализ с таймингами
-        timed_data = TimedAnalysisData()
-
-        if include_timings and transcript.word_timings:
-            timed_data = self._analyze_with_timings(transcript, audio_path, gigachat_client, cache)
+        Анализ — CPU-работа (чтение WAV, VAD, поиск пауз и паразитов),
+        поэтому он выполняется в пуле потоков и не блокирует event loop.
+        Базовый анализ и анализ по таймингам слов идут в одном потоке
+        друг за другом: WAV и VAD читаются один раз и общие для обоих.
+        """
+        base_result, timed_data = await asyncio.to_thread(
+            self._analyze_sync, transcript, audio_path,
+            include_timings and bool(transcript.word_timings), gigachat_client, cache)
 
         return EnhancedAnalysisResult(
             **base_result.dict(),
             timed_data=timed_data
         )
 
+    def _analyze_sync(
+        self,
+        transcript: Transcript,
+        audio_path: Path | None,
+        include_timings: bool,
+        gigachat_client: Optional[GigaChatClient] = None,
+        cache: Optional[AnalysisCache] = None,
+    ) -> Tuple[AnalysisResult, TimedAnalysisData]:
+        """Базовый анализ и (опционально) анализ по таймингам над одним прочтением аудио"""
+        audio = None
+        if audio_path is not None and transcript.segments:
+            audio = _load_pause_audio(audio_path)
+
+        base_result = self._analyze_basic(transcript, audio_path, audio=audio)
+        if not include_timings:
+            return base_result, TimedAnalysisData()
+        timed_data = self._analyze_with_timings(
+            transcript, audio_path, gigachat_client, cache, audio=audio)
+        return base_result, timed_data
+
     def _analyze_basic(
         self,
         transcript: Transcript,
         audio_path: Path | None = None,
+        audio: Optional[_PauseAudio] = None,
     ) -> AnalysisResult:
         """Базовый анализ без таймингов"""
         segments = transcript.segments
@@ -151,7 +274,7 @@ class SpeechAnalyzer:
             segments)
 
         # Фильтрация пауз по аудио
-        pauses_filtered = self._filter_pauses(audio_path, pauses_raw, segments)
+        pauses_filtered = self._filter_pauses(audio_path, pauses_raw, segments, audio)
 
         # Основные метрики
         words_per_minute = self._calculate_wpm(words_total, speaking_time_sec)
@@ -194,7 +317,7 @@ class SpeechAnalyzer:
             gigachat_analysis=None,
         )
 
-    def _analyze_with_timings(self, transcript: Transcript, audio_path: Path | None = None, gigachat_client: Optional[GigaChatClient] = None, cache: Optional[AnalysisCache] = None) -> TimedAnalysisData:
+    def _analyze_with_timings(self, transcript: Transcript, audio_path: Path | None = None, gigachat_client: Optional[GigaChatClient] = None, cache: Optional[AnalysisCache] = None, audio: Optional[_PauseAudio] = None) -> TimedAnalysisData:
         """Анализ с использованием таймингов слов (синхронная версия для тестов).
 
         Асинхронная/LLM-классификация наполнения контекста выполняется отдельно
@@ -205,7 +328,7 @@ class SpeechAnalyzer:
 
         return TimedAnalysisData(
             filler_words_detailed=self._find_fillers_with_exact_timings(transcript),
-            pauses_detailed=self._analyze_pauses_with_word_timings(transcript, audio_path),
+            pauses_detailed=self._analyze_pauses_with_word_timings(transcript, audio_path, audio),
             speech_rate_windows=self._calculate_speech_windows_by_words(transcript),
             word_timings_count=len(transcript.word_timings),
             speaking_activity=self._build_speaking_activity(transcript),
@@ -239,7 +362,7 @@ class SpeechAnalyzer:
 
         return fillers
 
-    def _analyze_pauses_with_word_timings(self, transcript: Transcript, audio_path: Path | None = None) -> List[TimedPause]:
+    def _analyze_pauses_with_word_timings(self, transcript: Transcript, audio_path: Path | None = None, audio: Optional[_PauseAudio] = None) -> List[TimedPause]:
         """Анализирует паузы между словами"""
         # Note: audio_path optional will be applied in filtering stage
         if len(transcript.word_timings) < 2:
@@ -267,7 +390,7 @@ class SpeechAnalyzer:
         filtered_raw = raw_pauses
         if audio_path is not None and raw_pauses:
             try:
-                filtered_raw = self._filter_noisy_pauses(audio_path, raw_pauses, transcript.segments)
+                filtered_raw = self._filter_noisy_pauses(audio_path, raw_pauses, transcript.segments, audio)
             except Exception:
                 filtered_raw = raw_pauses
 
@@ -448,14 +571,15 @@ class SpeechAnalyzer:
         self,
         audio_path: Path | None,
         pauses: List[Dict[str, float]],
-        segments: List[TranscriptSegment]
+        segments: List[TranscriptSegment],
+        audio: Optional[_PauseAudio] = None,
     ) -> List[Dict[str, float]]:
         """Фильтрует паузы по аудио"""
         if audio_path is None or not pauses:
             return pauses
 
         try:
-            return self._filter_noisy_pauses(audio_path, pauses, segments)
+            return self._filter_noisy_pauses(audio_path, pauses, segments, audio)
         except Exception as e:
             # При ошибке чтения аудио возвращаем сырые паузы
             return pauses
@@ -487,18 +611,26 @@ class SpeechAnalyzer:
         normalized_text = re.sub(r"(.)\1{2,}", r"\1\1", text.lower())
         normalized_text = normalized_text.replace('-', ' ')
 
-        # Используем finditer вместо findall чтобы правильно считать совпадения
-        found_positions = set()
+        # Литеральные паразиты - одним проходом автомата, остальные - регулярками
+        literal_spans = _find_literal_fillers(normalized_text)
+
+        # Отсортированные начала найденных совпадений (для проверки пересечений)
+        found_positions: List[int] = []
 
         for name, pattern in COMPILED_FILLERS:
-            for match in pattern.finditer(normalized_text):
-                start, end = match.span()
+            if name in AUTOMATON_FILLER_NAMES:
+                spans = literal_spans.get(name, ())
+            else:
+                spans = (match.span() for match in pattern.finditer(normalized_text))
+
+            for start, end in spans:
                 # Проверяем, не пересекается ли это совпадение с другими
-                if not any(start < pos <= end or pos >= start and pos < end 
-                          for pos in found_positions):
-                    found_positions.add(start)
-                    counts[name] = counts.get(name, 0) + 1
-                    total += 1
+                idx = bisect_left(found_positions, start)
+                if idx < len(found_positions) and found_positions[idx] <= end:
+                    continue
+                insort(found_positions, start)
+                counts[name] = counts.get(name, 0) + 1
+                total += 1
 
         return total, counts
 
@@ -507,30 +639,20 @@ class SpeechAnalyzer:
         audio_path: Path,
         pauses: List[Dict[str, float]],
         segments: List[TranscriptSegment],
+        audio: Optional[_PauseAudio] = None,
     ) -> List[Dict[str, float]]:
-        """Фильтрует шумные паузы"""
-        wav_read_failed = False
-        framerate = None
-        frames = b''
-        try:
-            with wave.open(str(audio_path), "rb") as wf:
-                n_channels, sampwidth, framerate, n_frames, *_ = wf.getparams()
-
-                if n_channels != 1 or sampwidth != 2:
-                    wav_read_failed = True
-                else:
-                    frames = wf.readframes(n_frames)
-        except Exception:
-            wav_read_failed = True
-
-        num_samples = len(frames) // 2 if frames else 0
+        """Фильтрует шумные паузы (audio — уже прочитанные WAV и VAD, если есть)"""
+        if audio is None:
+            audio = _load_pause_audio(audio_path)
+        framerate = audio.framerate
+        wav_read_failed = audio.samples is None
+        samples = _EMPTY_PCM16 if wav_read_failed else audio.samples
+
+        num_samples = len(samples)
         logger = logging.getLogger(__name__)
         logger.debug("_filter_noisy_pauses: wav_read_failed=%s, framerate=%s, num_samples=%s", wav_read_failed, framerate, num_samples)
         # Try early VAD detection — if we failed to read WAV, use VAD results to filter pauses immediately.
-        try:
-            early_vad_segments = vad.detect_speech_regions(audio_path, settings.use_pyannote_vad, settings.use_webrtc_vad, webrtc_mode=settings.webrtc_vad_mode, pyannote_model=settings.pyannote_model)
-        except Exception:
-            early_vad_segments = []
+        early_vad_segments = audio.vad_segments
 
         logger.debug("_filter_noisy_pauses: early_vad_segments_count=%s sample=%s", len(early_vad_segments), early_vad_segments[:3])
 
@@ -552,17 +674,14 @@ class SpeechAnalyzer:
             logger.debug("_filter_noisy_pauses: filtered_by_early_vad_count=%s", len(filtered))
             return filtered
 
-        samples = struct.unpack("<{}h".format(num_samples), frames)
-
         def segment_rms(start_idx: int, end_idx: int) -> float:
             """Вычисляет RMS для сегмента"""
             count = end_idx - start_idx
             if count <= 0:
                 return 0.0
 
-            sum_sq = sum(samples[i] * samples[i]
-                         for i in range(start_idx, end_idx))
-            return math.sqrt(sum_sq / count)
+            segment = samples[start_idx:end_idx].astype(np.float64)
+            return math.sqrt(float(np.dot(segment, segment)) / count)
 
         # RMS речевых сегментов
         speech_rms_values = []
@@ -591,10 +710,7 @@ class SpeechAnalyzer:
 
         # Если после всех попыток RMS не получился, попробуем фильтровать паузы только по VAD (если он доступен).
         if not speech_rms_values:
-            try:
-                vad_segments = vad.detect_speech_regions(audio_path, settings.use_pyannote_vad, settings.use_webrtc_vad, webrtc_mode=settings.webrtc_vad_mode, pyannote_model=settings.pyannote_model)
-            except Exception:
-                vad_segments = []
+            vad_segments = audio.vad_segments
 
             def has_vad_activity_local(start_s: float, end_s: float) -> bool:
                 for vstart, vend in vad_segments:
@@ -624,10 +740,7 @@ class SpeechAnalyzer:
         logger.debug("_filter_noisy_pauses: median_speech_rms=%s, silence_threshold=%s", median_speech_rms, silence_threshold)
 
         # Пытаемся использовать VAD (pyannote / webrtcvad) для исключения ложных пауз
-        try:
-            vad_segments = vad.detect_speech_regions(audio_path, settings.use_pyannote_vad, settings.use_webrtc_vad, webrtc_mode=settings.webrtc_vad_mode, pyannote_model=settings.pyannote_model)
-        except Exception as e:
-            vad_segments = []
+        vad_segments = audio.vad_segments
         logger.debug("_filter_noisy_pauses: vad_segments_count=%s sample=%s", len(vad_segments), vad_segments[:3])
 
         def has_vad_activity(start_s: float, end_s: float) -> bool:
@@ -1,6 +1,7 @@
 """
 Продвинутый анализатор речи с детализированными таймингами.
 """
+import asyncio
 import logging
 import math
 import re
@@ -16,7 +17,7 @@ from app.models.timed_models import (
     EmphasisDetail, QuestionDetail, SpeechElementType
 )
 from app.services.analyzer import (
-    SpeechAnalyzer, FILLER_DEFINITIONS, COMPILED_FILLERS,
+    SpeechAnalyzer, EnhancedAnalysisResult, FILLER_DEFINITIONS, COMPILED_FILLERS,
     MIN_PAUSE_GAP_SEC, LONG_PAUSE_SEC, SPEECH_RATE_WINDOW_SIZE,
     SPEECH_RATE_WINDOW_STEP
 )
@@ -74,6 +75,18 @@ class AdvancedSpeechAnalyzer:
         enhanced_result = await self.base_analyzer.analyze(
             transcript, include_timings=True)
 
+        # Детализация — CPU-работа (чтение WAV, проходы по словам), поэтому
+        # она выполняется в пуле потоков и не блокирует event loop
+        return await asyncio.to_thread(
+            self._build_timed_result, transcript, audio_path, enhanced_result)
+
+    def _build_timed_result(
+        self,
+        transcript: Transcript,
+        audio_path: Optional[Path],
+        enhanced_result: EnhancedAnalysisResult,
+    ) -> TimedAnalysisResult:
+        """Синхронная часть analyze_with_timings (выполняется в пуле потоков)"""
         # Собираем все слова с расширенной информацией (опционально используя аудио)
         advanced_words = self._create_advanced_word_timings(transcript, audio_path)
 
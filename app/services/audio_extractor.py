@@ -1,73 +1,209 @@
-import subprocess
+import asyncio
+import io
 import logging
+import wave
 from pathlib import Path
-from typing import Protocol
+from typing import Protocol, Tuple, Union
+
+import numpy as np
 
 from app.core.config import settings
+from app.core.exceptions import AudioExtractionError
+
+try:
+    import av  # PyAV: libavformat/libavcodec в процессе (зависимость faster-whisper)
+    _PYAV_AVAILABLE = True
+except ImportError:
+    av = None
+    _PYAV_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Whisper ожидает моно PCM 16 кГц
+SAMPLE_RATE = 16000
+
+# Размер порции при записи видео в stdin ffmpeg
+_STDIN_CHUNK_SIZE = 1 << 20
+
+# Сколько последних байт stderr ffmpeg включать в текст ошибки
+_STDERR_TAIL_BYTES = 2000
+
+VideoSource = Union[bytes, Path]
+
 
 class AudioExtractor(Protocol):
-    def extract(self, video_path: Path, audio_path: Path) -> None:
+    async def extract(self, video: VideoSource, timeout: float = 300) -> np.ndarray:
         ...
 
 
+async def _feed_stdin(stdin: asyncio.StreamWriter, video: bytes) -> None:
+    """Пишет видео в stdin ffmpeg порциями, соблюдая backpressure (drain)"""
+    try:
+        view = memoryview(video)
+        for offset in range(0, len(view), _STDIN_CHUNK_SIZE):
+            stdin.write(view[offset:offset + _STDIN_CHUNK_SIZE])
+            await stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        # ffmpeg закрыл stdin раньше — код возврата проверяется отдельно
+        pass
+    finally:
+        stdin.close()
+
+
+def save_wav(audio: np.ndarray, audio_path: Path, sample_rate: int = SAMPLE_RATE) -> None:
+    """Сохраняет float32 PCM [-1, 1] как моно WAV 16-bit."""
+    pcm = np.clip(audio * 32768.0, -32768, 32767).astype("<i2")
+    with wave.open(str(audio_path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm.tobytes())
+
+
+def _decode_with_pyav(video: Union[bytes, Path]) -> np.ndarray:
+    """Декодирует первую аудиодорожку в моно PCM 16 кГц через PyAV (без запуска ffmpeg)"""
+    source = io.BytesIO(video) if isinstance(video, (bytes, bytearray, memoryview)) else str(video)
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+    chunks = []
+
+    with av.open(source, mode="r") as container:
+        if not container.streams.audio:
+            raise RuntimeError("No audio stream in container")
+        stream = container.streams.audio[0]
+        for frame in container.decode(stream):
+            for resampled in resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        # Остаток во внутреннем буфере ресемплера
+        for resampled in resampler.resample(None):
+            chunks.append(resampled.to_ndarray().reshape(-1))
+
+    if not chunks:
+        raise RuntimeError("Extracted audio is empty")
+    return np.concatenate(chunks).astype(np.float32) / 32768.0
+
+
 class FfmpegAudioExtractor:
     def __init__(self, ffmpeg_path: str | None = None):
         self.ffmpeg_path = ffmpeg_path or settings.ffmpeg_path
 
-    def extract(self, video_path: Path, audio_path: Path) -> None:
+    async def extract(self, video: VideoSource, timeout: float = 300) -> np.ndarray:
         """
-        Извлекает моно WAV 16kHz из видео-файла с помощью ffmpeg.
+        Извлекает моно PCM 16kHz из видео с помощью ffmpeg без промежуточного WAV.
+
+        Видео передается байтами (через stdin, ffmpeg начинает декодирование
+        до получения всего файла) либо путем к файлу — MP4/MOV с moov-атомом
+        в конце файла ffmpeg не может разобрать из несикабельного pipe. Аудио
+        читается из stdout сразу как f32le — буфер становится float32-массивом
+        для faster-whisper без преобразования и лишней копии. Ошибки ffmpeg
+        (-loglevel error) попадают в текст AudioExtractionError.
+
+        Процесс запускается через asyncio, поэтому event loop не блокируется
+        на время работы ffmpeg.
         """
+        from_stdin = not isinstance(video, (str, Path))
         cmd = [
             self.ffmpeg_path,
-            "-y",  # Перезаписать без подтверждения
-            "-i", str(video_path),
+            "-hide_banner",
+            "-loglevel", "error",  # Только ошибки — для диагностики
+            "-nostats",
+            "-i", "pipe:0" if from_stdin else str(video),
             "-vn",  # Без видео
-            "-acodec", "pcm_s16le",
-            "-ar", "16000",  # Частота дискретизации
+            "-f", "f32le",
+            "-acodec", "pcm_f32le",
+            "-ar", str(SAMPLE_RATE),  # Частота дискретизации
             "-ac", "1",  # Моно
-            "-hide_banner",  # Скрыть баннер ffmpeg
-            "-loglevel", "quiet",  # ТИХИЙ режим - никакого вывода!
-            "-nostats",  # Без статистики
-            str(audio_path),
+            "pipe:1",
         ]
 
         logger.debug(f"Running ffmpeg: {' '.join(cmd)}")
 
         try:
-            # Используем subprocess.run с DEVNULL для подавления вывода
-            result = subprocess.run(
-                cmd,
-                check=True,
-                stdout=subprocess.DEVNULL,  # Подавляем stdout
-                stderr=subprocess.DEVNULL,  # Подавляем stderr
-                timeout=300  # Таймаут 5 минут
+            # close_fds=False: дескрипторы Python по умолчанию не наследуются
+            # (PEP 446), а обход /proc/self/fd в воркере uvicorn не бесплатен
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if from_stdin else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                close_fds=False,
             )
-
-            logger.info(f"Audio extracted successfully: {audio_path}")
-
-            # Проверяем, что файл создан и не пустой
-            if audio_path.exists():
-                file_size = audio_path.stat().st_size
-                if file_size > 0:
-                    logger.debug(f"Audio file size: {file_size} bytes")
-                else:
-                    raise RuntimeError("Extracted audio file is empty")
-            else:
-                raise RuntimeError("Audio file was not created")
-
-        except subprocess.TimeoutExpired:
-            logger.error("FFmpeg timeout (5 minutes)")
-            raise RuntimeError(
-                "Audio extraction timeout - video might be too long or corrupted")
-        except subprocess.CalledProcessError as e:
-            logger.error(f"FFmpeg failed with code {e.returncode}")
-            raise RuntimeError(
-                f"Failed to extract audio (code: {e.returncode})")
         except FileNotFoundError:
             logger.error(f"FFmpeg not found at: {self.ffmpeg_path}")
-            raise RuntimeError(
+            raise AudioExtractionError(
                 f"FFmpeg not found. Please install ffmpeg and add to PATH")
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                self._communicate(proc, video if from_stdin else None),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"FFmpeg timeout ({timeout:.0f}s)")
+            raise AudioExtractionError(
+                "Audio extraction timeout - video might be too long or corrupted")
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+        if proc.returncode != 0:
+            error_output = stderr[-_STDERR_TAIL_BYTES:].decode("utf-8", errors="replace").strip()
+            logger.error(f"FFmpeg failed with code {proc.returncode}: {error_output}")
+            message = f"Failed to extract audio (code: {proc.returncode})"
+            raise AudioExtractionError(f"{message}: {error_output}" if error_output else message)
+
+        if not stdout:
+            raise AudioExtractionError("Extracted audio is empty")
+
+        audio = np.frombuffer(stdout, dtype=np.float32)
+        logger.info(f"Audio extracted: {len(audio) / SAMPLE_RATE:.1f}s ({len(stdout):,} bytes PCM)")
+        return audio
+
+    @staticmethod
+    async def _communicate(proc: asyncio.subprocess.Process, video) -> Tuple[bytes, bytes]:
+        """Одновременно пишет stdin и читает stdout и stderr ffmpeg"""
+        feeder = None
+        if video is not None:
+            feeder = asyncio.create_task(_feed_stdin(proc.stdin, video))
+        try:
+            stdout, stderr = await asyncio.gather(proc.stdout.read(), proc.stderr.read())
+            await proc.wait()
+            if feeder is not None:
+                await feeder
+        finally:
+            if feeder is not None and not feeder.done():
+                feeder.cancel()
+        return stdout, stderr
+
+
+class PyAVAudioExtractor:
+    """
+    Извлекает аудио через PyAV в процессе: без fork/exec ffmpeg и копирования
+    PCM через pipe. Если PyAV не смог открыть или декодировать контейнер,
+    используется ffmpeg.
+    """
+
+    def __init__(self, fallback: AudioExtractor | None = None):
+        self.fallback = fallback or FfmpegAudioExtractor()
+
+    async def extract(self, video: VideoSource, timeout: float = 300) -> np.ndarray:
+        try:
+            audio = await asyncio.wait_for(
+                asyncio.to_thread(_decode_with_pyav, video), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"PyAV decode timeout ({timeout:.0f}s)")
+            raise AudioExtractionError(
+                "Audio extraction timeout - video might be too long or corrupted")
+        except Exception as e:
+            logger.warning(f"PyAV could not decode audio, falling back to ffmpeg: {e}")
+            return await self.fallback.extract(video, timeout=timeout)
+
+        logger.info(f"Audio decoded with PyAV: {len(audio) / SAMPLE_RATE:.1f}s")
+        return audio
+
+
+def create_audio_extractor() -> AudioExtractor:
+    """Экстрактор аудио по настройкам: PyAV (если установлен и включен) или ffmpeg"""
+    if _PYAV_AVAILABLE and settings.pyav_decoding_enabled:
+        return PyAVAudioExtractor()
+    return FfmpegAudioExtractor()
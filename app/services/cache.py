@@ -35,14 +35,11 @@ class AnalysisCache:
         key = self._get_cache_key(data)
         cache_file = self._get_cache_path(key)
 
-        if not cache_file.exists():
-            return None
-
         try:
-            # Проверяем TTL
+            # Проверяем TTL (отсутствующий файл — промах, без отдельной проверки exists)
             mtime = cache_file.stat().st_mtime
             if time.time() - mtime > self.ttl_seconds:
-                cache_file.unlink()
+                cache_file.unlink(missing_ok=True)
                 return None
 
             with open(cache_file, 'rb') as f:
@@ -50,6 +47,8 @@ class AnalysisCache:
                 logger.debug(f"Кеш hit: {key}")
                 return cached_data
 
+        except FileNotFoundError:
+            return None
         except Exception as e:
             logger.warning(f"Ошибка чтения кеша: {e}")
             return None
@@ -75,7 +74,7 @@ class AnalysisCache:
             try:
                 mtime = cache_file.stat().st_mtime
                 if now - mtime > self.ttl_seconds:
-                    cache_file.unlink()
+                    cache_file.unlink(missing_ok=True)
                     deleted += 1
             except Exception as e:
                 logger.warning(f"Ошибка удаления кеша {cache_file}: {e}")
@@ -86,15 +85,15 @@ class AnalysisCache:
     # --- Новые методы для работы по ключу (чтобы не держать весь файл в памяти) ---
     def get_by_key(self, key: str) -> Optional[Any]:
         cache_file = self._get_cache_path(key)
-        if not cache_file.exists():
-            return None
         try:
             mtime = cache_file.stat().st_mtime
             if time.time() - mtime > self.ttl_seconds:
-                cache_file.unlink()
+                cache_file.unlink(missing_ok=True)
                 return None
             with open(cache_file, 'rb') as f:
                 return pickle.load(f)
+        except FileNotFoundError:
+            return None
         except Exception as e:
             logger.warning(f"Ошибка чтения кеша: {e}")
             return None
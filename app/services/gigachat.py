@@ -1,5 +1,8 @@
+import asyncio
+import importlib.util
 import os
 import json
+import random
 import re
 import logging
 import uuid
@@ -14,14 +17,324 @@ from app.models.gigachat import GigaChatAnalysis
 from app.models.analysis import AnalysisResult
 from app.services.cache import AnalysisCache
 
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    _ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+def _json_dumps(data: Any) -> bytes:
+    """Сериализует тело запроса (orjson, если установлен)"""
+    if _ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def _json_loads(data):
+    """Разбирает JSON (orjson, если установлен); ошибки — json.JSONDecodeError"""
+    if _ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class GigaChatError(Exception):
     """GigaChat API error."""
     pass
 
 
+# Повторы при 429/503: экспоненциальная задержка с джиттером
+_RETRY_STATUS_CODES = (429, 503)
+_RETRY_MAX_ATTEMPTS = 5
+_RETRY_BASE_DELAY_SEC = 1.0
+_RETRY_MAX_DELAY_SEC = 30.0
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Задержка перед повтором: Retry-After (если указан в секундах) или экспоненциальная с джиттером"""
+    retry_after = response.headers.get("Retry-After", "").strip()
+    if retry_after.isdigit():
+        return min(float(retry_after), _RETRY_MAX_DELAY_SEC) + random.uniform(0, 1)
+
+    delay = min(_RETRY_MAX_DELAY_SEC, _RETRY_BASE_DELAY_SEC * 2 ** attempt)
+    return random.uniform(delay * 0.5, delay * 1.5)
+
+
+# Неизменная часть заголовков запросов: копируется, а не собирается заново
+_AUTH_BASE_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Accept": "application/json",
+}
+_API_BASE_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+}
+
+_TRANSCRIPT_CLIPPED_MARK = "... [текст сокращен]"
+
+
+def _clip_transcript(transcript: str, limit: int) -> str:
+    """Обрезает транскрипт до limit символов с пометкой; короткий возвращает как есть"""
+    if len(transcript) <= limit:
+        return transcript
+    return transcript[:limit] + _TRANSCRIPT_CLIPPED_MARK
+
+
+# Пауза в обращениях к GigaChat после отказа, пережившего все повторы:
+# пока она не истекла, анализ сразу возвращает None без сетевых запросов
+_UNAVAILABLE_COOLDOWN_SEC = 60.0
+_AUTH_FAILURE_COOLDOWN_SEC = 15.0
+
+
+def _cooldown_for(response: httpx.Response) -> Optional[float]:
+    """Длительность паузы после ответа GigaChat или None, если пауза не нужна"""
+    if response.status_code == 401:
+        return _AUTH_FAILURE_COOLDOWN_SEC
+    if response.status_code == 429 or response.status_code >= 500:
+        retry_after = response.headers.get("Retry-After", "").strip()
+        if retry_after.isdigit():
+            # Ограничиваем, как в _retry_delay: огромный Retry-After не должен
+            # отключать GigaChat на часы
+            return min(float(retry_after), _RETRY_MAX_DELAY_SEC)
+        return _UNAVAILABLE_COOLDOWN_SEC
+    return None
+
+
+# HTTP/2 (мультиплексирование запросов в одном соединении) требует пакет h2
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Шлюз GigaChat держит соединения дольше 5 с (значение httpx по умолчанию)
+_KEEPALIVE_EXPIRY_SEC = 30.0
+
+# Общие HTTP-клиенты (один пул TCP/TLS-соединений) для всех экземпляров
+# GigaChatClient — по одному на режим проверки SSL
+_shared_clients: Dict[bool, httpx.AsyncClient] = {}
+
+
+def _get_shared_client(verify_ssl: bool, timeout: float) -> httpx.AsyncClient:
+    """Возвращает общий AsyncClient, создавая его при первом обращении.
+
+    Создание синхронное (без await между проверкой и записью), поэтому в
+    пределах event loop гонки нет и блокировка не нужна.
+    """
+    client = _shared_clients.get(verify_ssl)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            verify=verify_ssl,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_keepalive_connections=20, max_connections=100,
+                keepalive_expiry=_KEEPALIVE_EXPIRY_SEC)
+        )
+        _shared_clients[verify_ssl] = client
+    return client
+
+
+async def close_shared_clients() -> None:
+    """Закрывает общие HTTP-клиенты (при завершении приложения)"""
+    clients = list(_shared_clients.values())
+    _shared_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+# Регулярные выражения очистки JSON-ответов модели (компилируются один раз)
+_LINE_COMMENT_RE = re.compile(r'\s+//.*')
+_TRAILING_LINE_COMMENT_RE = re.compile(r'\s*//.*$', flags=re.MULTILINE)
+_TRAILING_COMMA_RE = re.compile(r',\s*(?=[}\]])')
+_SINGLE_QUOTED_KEY_RE = re.compile(r"'([^']*)':")
+_SINGLE_QUOTED_VALUE_RE = re.compile(r":\s*'([^']*)'")
+
+# Стратегии исправления JSON, применяемые по очереди
+_JSON_REPAIR_STRATEGIES = (
+    # Стратегия 1: удалить строки комментариев
+    lambda s: _TRAILING_LINE_COMMENT_RE.sub('', s),
+    # Стратегия 2: заменить одинарные кавычки на двойные в ключах и строковых значениях
+    lambda s: _SINGLE_QUOTED_KEY_RE.sub(r'"\1":', s),  # ключи
+    lambda s: _SINGLE_QUOTED_VALUE_RE.sub(r': "\1"', s),  # значения
+    # Стратегия 3: комбинация предыдущих
+    lambda s: _TRAILING_LINE_COMMENT_RE.sub('', _SINGLE_QUOTED_KEY_RE.sub(r'"\1":', s)),
+)
+
+
+# Системное сообщение и шаблон промпта анализа собираются один раз при импорте;
+# на запрос подставляются только метрики (str.format_map)
+_ANALYSIS_SYSTEM_MESSAGE: Dict[str, str] = {
+    "role": "system",
+    "content": """Ты инструктор по публичным выступлениям, обучающий студентов навыкам ораторского мастерства.
+
+Входные данные: транскрипт выступления + объективные метрики (темп, паузы, паразиты).
+
+Твоя задача: 
+1) Анализируй транскрипт как целое (структура, логика, ясность)
+2) Используй метрики как подтверждение/опровержение твоих выводов
+3) Дай КОНКРЕТНЫЕ, ВЫПОЛНИМЫЕ рекомендации
+
+Критерии оценки (в порядке важности):
+- СОДЕРЖАНИЕ (организация, логика, полнота): 40%
+- ДОСТАВКА (беглость, уверенность, плавность): 30%
+- ЯСНОСТЬ (доступность языка, отсутствие двусмысленностей): 20%
+- ВЛИЯНИЕ (запоминаемость, убедительность): 10%
+
+Выходной формат: JSON. Структура точно как указано ниже.
+
+ЗАПРЕТЫ:
+- ❌ Не придумывай примеры, которых нет в транскрипте
+- ❌ Не добавляй метрики, которых я не дал
+- ❌ Если данных недостаточно, скажи "недостаточно информации" вместо выдумки
+- ❌ Не добавляй текст ДО JSON, не добавляй текст ПОСЛЕ JSON
+- ❌ Используй ТОЛЬКО двойные кавычки для строк в JSON
+
+КРИТИЧЕСКИЕ ПРАВИЛА:
+- ✅ Ссылайся на конкретные фрагменты транскрипта
+- ✅ Используй цифры из метрик, не придумывай новые
+- ✅ Каждая рекомендация должна быть ДЕЙСТВЕННОЙ (можно ли ее выполнить за неделю?)
+- ✅ Баланс похвалы и критики: минимум 50% хороших замечаний
+- ✅ Твой ответ ДОЛЖЕН быть валидным JSON без исключений""",
+}
+
+_ANALYSIS_PROMPT_TEMPLATE = """АНАЛИЗИРУЙ ВЫСТУПЛЕНИЕ СТУДЕНТА:
+
+═══════════════════════════════════════════════════════════════════════════════
+ОБЪЕКТИВНЫЕ ДАННЫЕ
+═══════════════════════════════════════════════════════════════════════════════
+Длительность выступления: {duration_sec:.1f} секунд
+Всего слов в выступлении: {words_total}
+
+ТЕМП РЕЧИ И БЕГЛОСТЬ:
+• Скорость речи: {wpm:.1f} слов/минуту
+  (Интерпретация: {tempo_interpretation})
+
+• Средняя длина фразы: {avg_phrase_len:.1f} слов
+  (Интерпретация: {phrase_interpretation})
+
+• Разнообразие темпа: {rhythm_variation}
+  
+ДИСФЛЮЕНТНОСТЬ (признаки неуверенности):
+• Слова-паразиты: {fillers_total} всего
+• Частота паразитов: {fillers_per_100:.1f} на 100 слов
+  (Норма: < 2 на 100 слов | Текущий уровень: {filler_interpretation})
+
+{filler_block}
+
+ПАУЗЫ (стратегия пауз):
+• Количество пауз: {pauses_count}
+• Средняя длина: {pauses_avg_sec:.2f} сек
+• Максимальная: {max_pause:.2f} сек
+  (Интерпретация: {pause_interpretation})
+
+{pauses_block}
+
+═══════════════════════════════════════════════════════════════════════════════
+ПОЛНЫЙ ТРАНСКРИПТ (для анализа содержания)
+═══════════════════════════════════════════════════════════════════════════════
+{transcript}
+
+═══════════════════════════════════════════════════════════════════════════════
+ТВОЙ АНАЛИЗ: Ответь на эти вопросы мысленно перед JSON'ом
+═══════════════════════════════════════════════════════════════════════════════
+
+1️⃣ СТРУКТУРА (читаешь весь транскрипт снизу вверху):
+   - Четкое ли начало? Что первое слово/фраза?
+   - Развиваются ли идеи? Есть ли "поворотные моменты"?
+   - Сильное ли завершение? Или просто обрывается?
+   - Есть ли скрытые переходы ("во-первых", "следовательно", "в итоге")?
+
+2️⃣ СОДЕРЖАНИЕ (выделяешь основные идеи):
+   - Главная идея (в одном предложении)?
+   - Поддерживающие идеи? Примеры? Доказательства?
+   - Есть ли пустые места (идея высказана, но не развита)?
+
+3️⃣ СОГЛАСОВАННОСТЬ МЕТРИК И СОДЕРЖАНИЯ:
+   - Быстрый темп ({wpm:.0f} слов/мин) указывает на спешку или волнение?
+   - Паразиты ({fillers_per_100:.1f}/100) говорят о нерешительности?
+   - Пауз ({pauses_count} шт) — это обдумывание или неуверенность?
+
+4️⃣ ЯЗЫК И ДОСТУПНОСТЬ:
+   - Сложные ли термины? Объясняются ли?
+   - Предложения понятные? Не слишком сложные ли?
+   - Есть ли коллоквиализмы/жаргон?
+
+5️⃣ ВЕРНИ СТРУКТУРИРОВАННЫЙ JSON (строго как ниже, БЕЗ КАКИХ-ЛИБО ТЕКСТОВ ПЕРЕД ИЛИ ПОСЛЕ):
+
+{{
+    "выступление_анализ": {{
+        "общее_впечатление": "1-2 предложения о выступлении в целом",
+        "главная_идея": "Опиши в одном предложении основной месседж",
+        "оценка_из_100": число от 1 до 100
+    }},
+    
+    "структура_и_организация": {{
+        "есть_ли_четкая_структура": "да/нет + объяснение (2-3 предложения)",
+        "введение": "как оратор начинает? эффективное ли?",
+        "основная_часть": "развиваются ли идеи логично? найди 1-2 примера из текста",
+        "заключение": "сильное ли завершение? запоминается ли?",
+        "оценка": число 1-10
+    }},
+    
+    "содержание": {{
+        "основные_идеи": ["идея 1", "идея 2", "идея 3"],
+        "примеры_и_доказательства": "есть ли подтверждение каждой идеи? достаточно?",
+        "пропуски_или_слабости": ["слабость 1", "слабость 2"] или [],
+        "оценка": число 1-10
+    }},
+    
+    "язык_и_доступность": {{
+        "уровень_сложности": "простой/средний/сложный",
+        "проблемные_места": ["термин который не объяснен", "слишком сложное предложение"] или [],
+        "оценка": число 1-10
+    }},
+    
+    "доставка_и_беглость": {{
+        "интерпретация_темпа": "{wpm:.1f} слов/мин означает {tempo_interpretation}",
+        "интерпретация_паразитов": "{fillers_per_100:.1f}/100 слов указывает на {filler_interpretation}",
+        "интерпретация_пауз": "паузы используются так. Это [хорошо/плохо] потому что [объяснение]",
+        "общая_оценка_доставки": "уверенный/нервный/размеренный голос, [почему?]",
+        "оценка": число 1-10
+    }},
+    
+    "сильные_стороны": [
+        "Сильная сторона 1 (с примером из текста выступления)",
+        "Сильная сторона 2",
+        "Сильная сторона 3"
+    ],
+    
+    "области_для_улучшения": [
+        {{
+            "проблема": "ЧТО нужно улучшить (четко и конкретно)",
+            "причина": "ПОЧЕМУ это проблема",
+            "решение": "КАК это исправить (действенный совет)"
+        }},
+        {{
+            "проблема": "...",
+            "причина": "...",
+            "решение": "..."
+        }}
+    ],
+    
+    "главные_рекомендации": [
+        "Рекомендация 1: [действенный совет, который можно выполнить за неделю]",
+        "Рекомендация 2: [...]",
+        "Рекомендация 3: [...]",
+        "Рекомендация 4: [...]"
+    ],
+    
+    "приоритет_развития": "Какой ОДИН навык улучшить в первую очередь? (с объяснением)",
+    
+    "уровень_уверенности": число от 0 до 1
+}}
+
+ВАЖНО: 
+- Каждое утверждение подкреплено примерами из транскрипта
+- Рекомендации действенные, не общие фразы
+- Баланс: 50% похвалы, 50% критики
+- Используй метрики как подтверждение выводов"""
+
+
 def should_verify_ssl() -> bool:
     """Determine whether to verify SSL certificates."""
     verify_env = os.environ.get('GIGACHAT_VERIFY_SSL', '').lower()
@@ -62,29 +375,102 @@ class GigaChatClient:
 
         self._access_token: Optional[str] = None
         self._token_expires_at: Optional[float] = None
+        self._auth_lock = asyncio.Lock()
+        # time.monotonic(), до которого GigaChat считается недоступным
+        self._unavailable_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        """False, пока действует пауза после отказа GigaChat"""
+        return time.monotonic() >= self._unavailable_until
+
+    def _mark_unavailable(self, seconds: float, reason: str) -> None:
+        """Приостанавливает обращения к GigaChat на seconds секунд"""
+        self._unavailable_until = max(self._unavailable_until, time.monotonic() + seconds)
+        logger.warning(f"GigaChat unavailable ({reason}), skipping requests for {seconds:.0f}s")
+
+    def _check_response_for_cooldown(self, response: httpx.Response) -> None:
+        """Включает паузу, если ответ говорит о недоступности или неверном токене"""
+        cooldown = _cooldown_for(response)
+        if cooldown is None:
+            return
+        if response.status_code == 401:
+            # Токен отозван или истек раньше срока — следующий запрос получит новый
+            self._access_token = None
+        self._mark_unavailable(cooldown, f"status {response.status_code}")
+
+    def _api_headers(self) -> Dict[str, str]:
+        """Заголовки запроса к API с текущим токеном"""
+        return {**_API_BASE_HEADERS, "Authorization": f"Bearer {self._access_token}"}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Общий HTTP-клиент для текущего режима проверки SSL"""
+        return _get_shared_client(self.verify_ssl, self.timeout)
+
+    def token_expires_in(self) -> Optional[float]:
+        """Секунды до истечения текущего токена (отрицательные — уже истек) или None, если токена нет"""
+        if not self._access_token or self._token_expires_at is None:
+            return None
+        return self._token_expires_at - time.time()
 
-        self.client = httpx.AsyncClient(
-            timeout=self.timeout,
-            verify=self.verify_ssl,
-            limits=httpx.Limits(
-                max_keepalive_connections=5, max_connections=10)
-        )
+    def _token_valid(self) -> bool:
+        """Токен есть и истекает не раньше чем через 60 секунд"""
+        return bool(self._access_token and self._token_expires_at
+                    and time.time() < self._token_expires_at - 60)
+
+    def _store_token(self, auth_result: Dict[str, Any]) -> None:
+        """Сохраняет токен и абсолютное время его истечения (секунды POSIX)"""
+        self._access_token = auth_result.get("access_token")
+
+        # Получаем время жизни токена из ответа
+        expires_in = auth_result.get("expires_in")  # обычно в секундах
+        expires_at = auth_result.get("expires_at")
+        if expires_in:
+            # Преобразуем в абсолютное время
+            self._token_expires_at = time.time() + expires_in
+        elif isinstance(expires_at, (int, float)):
+            # GigaChat возвращает expires_at в миллисекундах
+            if expires_at > 1e12:
+                expires_at = expires_at / 1000.0
+            if expires_at > 1e9:
+                # Это абсолютное время
+                self._token_expires_at = float(expires_at)
+            else:
+                # Это время жизни, преобразуем в абсолютное
+                self._token_expires_at = time.time() + expires_at
+        else:
+            # По умолчанию устанавливаем время истечения через 9 минут (540 секунд)
+            self._token_expires_at = time.time() + 540
+
+    async def authenticate(self, force: bool = False) -> None:
+        """Authenticate to GigaChat API.
 
-    async def authenticate(self) -> None:
-        """Authenticate to GigaChat API."""
+        force=True запрашивает новый токен, даже если текущий еще действителен
+        (используется фоновым обновлением токена). Одновременные вызовы
+        ждут один общий запрос токена вместо того, чтобы слать свои.
+        """
         if not self.api_key:
             raise GigaChatError("GigaChat API key not configured")
 
         # Check if cached token is still valid
-        if self._access_token and self._token_expires_at:
-            if time.time() < self._token_expires_at - 60:  # 60 seconds buffer
-                logger.debug("Using cached access token")
+        if not force and self._token_valid():
+            logger.debug("Using cached access token")
+            return
+
+        async with self._auth_lock:
+            # Пока ждали блокировку, токен мог обновить другой запрос
+            if not force and self._token_valid():
+                logger.debug("Using access token refreshed by concurrent request")
                 return
+            await self._request_token()
 
+    async def _request_token(self) -> None:
+        """Запрашивает новый токен доступа"""
         try:
+            # RqUID — UUID4 в каноническом виде с дефисами, как требует API
             headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Accept": "application/json",
+                **_AUTH_BASE_HEADERS,
                 "RqUID": str(uuid.uuid4()),
                 "Authorization": f"Basic {self.api_key}"
             }
@@ -93,61 +479,24 @@ class GigaChatClient:
 
             logger.info(f"Authenticating to GigaChat API")
 
-            auth_response = await self.client.post(
+            auth_response = await self._post_with_retry(
                 self.auth_url,
                 headers=headers,
                 data=data
             )
 
-            if auth_response.status_code == 429:
-                # Ошибка 429 - слишком много запросов
-                logger.warning(
-                    "GigaChat rate limit exceeded (429 Too Many Requests)")
-                logger.warning("Waiting and retrying...")
-
-                # Ждем 30 секунд и пробуем еще раз
-                import asyncio
-                await asyncio.sleep(30)
-
-                # Повторная попытка
-                auth_response = await self.client.post(
-                    self.auth_url,
-                    headers=headers,
-                    data=data
-                )
-
             if auth_response.status_code != 200:
                 logger.error(f"Auth failed with status {auth_response.status_code}: {auth_response.text}")
 
-                # Если все еще ошибка после повторной попытки
+                # Если все еще ошибка после повторных попыток
                 if auth_response.status_code == 429:
                     raise GigaChatError(
                         "GigaChat rate limit exceeded. Please try again later.")
                 else:
                     auth_response.raise_for_status()
 
-            auth_result = auth_response.json()
-            self._access_token = auth_result.get("access_token")
-            
-            # Получаем время жизни токена из ответа
-            expires_in = auth_result.get("expires_in")  # обычно в секундах
-            if expires_in:
-                # Преобразуем в абсолютное время
-                self._token_expires_at = time.time() + expires_in
-            else:
-                # Если нет expires_in, используем expires_at (если это абсолютное время)
-                expires_at = auth_result.get("expires_at")
-                if isinstance(expires_at, (int, float)):
-                    # Проверяем, является ли это timestamp (большое число) или временем жизни (меньше 1 дня)
-                    if expires_at > time.time() + 86400:  # больше чем через день
-                        # Это абсолютное время
-                        self._token_expires_at = expires_at
-                    else:
-                        # Это время жизни, преобразуем в абсолютное
-                        self._token_expires_at = time.time() + expires_at
-                else:
-                    # По умолчанию устанавливаем время истечения через 9 минут (540 секунд)
-                    self._token_expires_at = time.time() + 540
+            auth_result = _json_loads(auth_response.content)
+            self._store_token(auth_result)
 
             if not self._access_token:
                 logger.error(f"No access_token in response: {auth_result}")
@@ -174,17 +523,24 @@ class GigaChatClient:
             logger.error(f"GigaChat authentication error: {e}")
             raise GigaChatError(f"Authentication error: {e}")
 
+    async def _post_with_retry(self, url: str, **kwargs) -> httpx.Response:
+        """POST с повторами при 429/503; возвращает последний ответ"""
+        for attempt in range(_RETRY_MAX_ATTEMPTS):
+            response = await self.client.post(url, **kwargs)
+            if response.status_code not in _RETRY_STATUS_CODES or attempt == _RETRY_MAX_ATTEMPTS - 1:
+                return response
+
+            delay = _retry_delay(response, attempt)
+            logger.warning(
+                f"GigaChat rate-limited (status {response.status_code}), "
+                f"retrying in {delay:.1f}s (attempt {attempt + 1}/{_RETRY_MAX_ATTEMPTS})")
+            await asyncio.sleep(delay)
+        return response
+
     async def _retry_without_ssl(self, headers: dict, data: dict):
         """Повторяет аутентификацию без проверки SSL"""
-        logger.warning("Creating new client with SSL verification disabled")
-
-        await self.client.aclose()
-        self.client = httpx.AsyncClient(
-            timeout=self.timeout,
-            verify=False,
-            limits=httpx.Limits(
-                max_keepalive_connections=5, max_connections=10)
-        )
+        logger.warning("Switching to client with SSL verification disabled")
+        self.verify_ssl = False
 
         auth_response = await self.client.post(
             self.auth_url,
@@ -193,35 +549,13 @@ class GigaChatClient:
         )
         auth_response.raise_for_status()
 
-        auth_result = auth_response.json()
-        self._access_token = auth_result.get("access_token")
-        
-        # Устанавливаем время истечения токена также и в этом случае
-        expires_in = auth_result.get("expires_in")  # обычно в секундах
-        if expires_in:
-            # Преобразуем в абсолютное время
-            self._token_expires_at = time.time() + expires_in
-        else:
-            # Если нет expires_in, используем expires_at (если это абсолютное время)
-            expires_at = auth_result.get("expires_at")
-            if isinstance(expires_at, (int, float)):
-                # Проверяем, является ли это timestamp (большое число) или временем жизни (меньше 1 дня)
-                if expires_at > time.time() + 86400:  # больше чем через день
-                    # Это абсолютное время
-                    self._token_expires_at = expires_at
-                else:
-                    # Это время жизни, преобразуем в абсолютное
-                    self._token_expires_at = time.time() + expires_at
-            else:
-                # По умолчанию устанавливаем время истечения через 9 минут (540 секунд)
-                self._token_expires_at = time.time() + 540
+        self._store_token(_json_loads(auth_response.content))
 
         if not self._access_token:
             raise GigaChatError("Failed to obtain access token")
 
         logger.info(
             "GigaChat authentication successful (SSL verification disabled)")
-        self.verify_ssl = False
 
     async def analyze_speech(self, analysis_result: AnalysisResult) -> Optional[GigaChatAnalysis]:
         """
@@ -232,12 +566,17 @@ class GigaChatClient:
             logger.info("GigaChat analysis is disabled")
             return None
 
+        if not self.available:
+            logger.info("GigaChat is temporarily unavailable, skipping analysis")
+            return None
+
         # Пробуем аутентифицироваться, если нужно
         if not self._access_token:
             try:
                 await self.authenticate()
             except GigaChatError as e:
                 logger.warning(f"Failed to authenticate with GigaChat: {e}")
+                self._mark_unavailable(_AUTH_FAILURE_COOLDOWN_SEC, "authentication failed")
                 return None
 
         try:
@@ -253,65 +592,20 @@ class GigaChatClient:
 
             chat_url = f"{self.api_url}/chat/completions"
 
-            request_data = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": """Ты инструктор по публичным выступлениям, обучающий студентов навыкам ораторского мастерства.
-
-Входные данные: транскрипт выступления + объективные метрики (темп, паузы, паразиты).
-
-Твоя задача: 
-1) Анализируй транскрипт как целое (структура, логика, ясность)
-2) Используй метрики как подтверждение/опровержение твоих выводов
-3) Дай КОНКРЕТНЫЕ, ВЫПОЛНИМЫЕ рекомендации
-
-Критерии оценки (в порядке важности):
-- СОДЕРЖАНИЕ (организация, логика, полнота): 40%
-- ДОСТАВКА (беглость, уверенность, плавность): 30%
-- ЯСНОСТЬ (доступность языка, отсутствие двусмысленностей): 20%
-- ВЛИЯНИЕ (запоминаемость, убедительность): 10%
-
-Выходной формат: JSON. Структура точно как указано ниже.
-
-ЗАПРЕТЫ:
-- ❌ Не придумывай примеры, которых нет в транскрипте
-- ❌ Не добавляй метрики, которых я не дал
-- ❌ Если данных недостаточно, скажи "недостаточно информации" вместо выдумки
-- ❌ Не добавляй текст ДО JSON, не добавляй текст ПОСЛЕ JSON
-- ❌ Используй ТОЛЬКО двойные кавычки для строк в JSON
-
-КРИТИЧЕСКИЕ ПРАВИЛА:
-- ✅ Ссылайся на конкретные фрагменты транскрипта
-- ✅ Используй цифры из метрик, не придумывай новые
-- ✅ Каждая рекомендация должна быть ДЕЙСТВЕННОЙ (можно ли ее выполнить за неделю?)
-- ✅ Баланс похвалы и критики: минимум 50% хороших замечаний
-- ✅ Твой ответ ДОЛЖЕН быть валидным JSON без исключений"""
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                # Use configured max tokens (no artificial 2000 cap)
-                "max_tokens": int(self.max_tokens),
-                "response_format": {"type": "json_object"},
-            }
+            request_data = self._analysis_request_data(prompt, int(self.max_tokens))
 
-            headers = {
-                "Authorization": f"Bearer {self._access_token}",
-                "Content-Type": "application/json",
-                "Accept": "application/json"
-            }
+            headers = self._api_headers()
 
             logger.info("Sending analysis request to GigaChat...")
 
-            response = await self.client.post(chat_url, json=request_data, headers=headers)
+            response = await self._post_with_retry(chat_url, content=_json_dumps(request_data), headers=headers)
 
             if response.status_code != 200:
                 logger.error(f"GigaChat API error {response.status_code}: {response.text}")
+                self._check_response_for_cooldown(response)
                 return None
 
-            result = response.json()
+            result = _json_loads(response.content)
 
             if "choices" not in result or len(result["choices"]) == 0:
                 logger.error("No choices in GigaChat response")
@@ -344,18 +638,32 @@ class GigaChatClient:
             logger.error(f"Unexpected error in GigaChat analysis: {e}")
             return None
 
+    def _analysis_request_data(self, prompt: str, max_tokens: int) -> Dict[str, Any]:
+        """Тело запроса /chat/completions для анализа выступления"""
+        return {
+            "model": self.model,
+            "messages": [
+                _ANALYSIS_SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            # Use configured max tokens (no artificial 2000 cap)
+            "max_tokens": max_tokens,
+            "response_format": {"type": "json_object"},
+        }
+
     def _create_analysis_prompt(self, analysis_result: AnalysisResult) -> str:
         """Создает оптимизированный промпт для анализа (вариант 3: Recommended)"""
-        filler_items = ""
-        for item in analysis_result.filler_words.items:
-            if item.get("count", 0) > 0:
-                filler_items += f"- {item['word']}: {item['count']} раз\n"
+        filler_items = "".join(
+            f"- {item['word']}: {item['count']} раз\n"
+            for item in analysis_result.filler_words.items
+            if item.get("count", 0) > 0
+        )
 
-        pauses_info = ""
-        if analysis_result.pauses.long_pauses:
-            pauses_info = ""
-            for pause in analysis_result.pauses.long_pauses[:3]:
-                pauses_info += f"- {pause['duration']:.1f} сек (с {pause['start']:.1f} по {pause['end']:.1f})\n"
+        pauses_info = "".join(
+            f"- {pause['duration']:.1f} сек (с {pause['start']:.1f} по {pause['end']:.1f})\n"
+            for pause in analysis_result.pauses.long_pauses[:3]
+        )
 
         # Интерпретация темпа
         wpm = analysis_result.words_per_minute
@@ -373,150 +681,47 @@ class GigaChatClient:
         max_pause = analysis_result.pauses.max_sec
         pause_interpretation = "очень длинные паузы - может выглядеть как растерянность" if max_pause > 3 else "нормальные паузы - хорошо" if max_pause > 1 else "очень короткие - мало дышит"
 
-        prompt = f"""АНАЛИЗИРУЙ ВЫСТУПЛЕНИЕ СТУДЕНТА:
-
-═══════════════════════════════════════════════════════════════════════════════
-ОБЪЕКТИВНЫЕ ДАННЫЕ
-═══════════════════════════════════════════════════════════════════════════════
-Длительность выступления: {analysis_result.duration_sec:.1f} секунд
-Всего слов в выступлении: {analysis_result.words_total}
-
-ТЕМП РЕЧИ И БЕГЛОСТЬ:
-• Скорость речи: {wpm:.1f} слов/минуту
-  (Интерпретация: {tempo_interpretation})
-
-• Средняя длина фразы: {avg_phrase_len:.1f} слов
-  (Интерпретация: {phrase_interpretation})
-
-• Разнообразие темпа: {analysis_result.phrases.rhythm_variation}
-  
-ДИСФЛЮЕНТНОСТЬ (признаки неуверенности):
-• Слова-паразиты: {analysis_result.filler_words.total} всего
-• Частота паразитов: {fillers_per_100:.1f} на 100 слов
-  (Норма: < 2 на 100 слов | Текущий уровень: {filler_interpretation})
-
-{f'• Самые частые: {filler_items}' if filler_items else ''}
-
-ПАУЗЫ (стратегия пауз):
-• Количество пауз: {analysis_result.pauses.count}
-• Средняя длина: {analysis_result.pauses.avg_sec:.2f} сек
-• Максимальная: {max_pause:.2f} сек
-  (Интерпретация: {pause_interpretation})
-
-{f'• {pauses_info}' if pauses_info else ''}
-
-═══════════════════════════════════════════════════════════════════════════════
-ПОЛНЫЙ ТРАНСКРИПТ (для анализа содержания)
-═══════════════════════════════════════════════════════════════════════════════
-{analysis_result.transcript}
-
-═══════════════════════════════════════════════════════════════════════════════
-ТВОЙ АНАЛИЗ: Ответь на эти вопросы мысленно перед JSON'ом
-═══════════════════════════════════════════════════════════════════════════════
-
-1️⃣ СТРУКТУРА (читаешь весь транскрипт снизу вверху):
-   - Четкое ли начало? Что первое слово/фраза?
-   - Развиваются ли идеи? Есть ли "поворотные моменты"?
-   - Сильное ли завершение? Или просто обрывается?
-   - Есть ли скрытые переходы ("во-первых", "следовательно", "в итоге")?
-
-2️⃣ СОДЕРЖАНИЕ (выделяешь основные идеи):
-   - Главная идея (в одном предложении)?
-   - Поддерживающие идеи? Примеры? Доказательства?
-   - Есть ли пустые места (идея высказана, но не развита)?
-
-3️⃣ СОГЛАСОВАННОСТЬ МЕТРИК И СОДЕРЖАНИЯ:
-   - Быстрый темп ({wpm:.0f} слов/мин) указывает на спешку или волнение?
-   - Паразиты ({fillers_per_100:.1f}/100) говорят о нерешительности?
-   - Пауз ({analysis_result.pauses.count} шт) — это обдумывание или неуверенность?
-
-4️⃣ ЯЗЫК И ДОСТУПНОСТЬ:
-   - Сложные ли термины? Объясняются ли?
-   - Предложения понятные? Не слишком сложные ли?
-   - Есть ли коллоквиализмы/жаргон?
-
-5️⃣ ВЕРНИ СТРУКТУРИРОВАННЫЙ JSON (строго как ниже, БЕЗ КАКИХ-ЛИБО ТЕКСТОВ ПЕРЕД ИЛИ ПОСЛЕ):
-
-{{
-    "выступление_анализ": {{
-        "общее_впечатление": "1-2 предложения о выступлении в целом",
-        "главная_идея": "Опиши в одном предложении основной месседж",
-        "оценка_из_100": число от 1 до 100
-    }},
-    
-    "структура_и_организация": {{
-        "есть_ли_четкая_структура": "да/нет + объяснение (2-3 предложения)",
-        "введение": "как оратор начинает? эффективное ли?",
-        "основная_часть": "развиваются ли идеи логично? найди 1-2 примера из текста",
-        "заключение": "сильное ли завершение? запоминается ли?",
-        "оценка": число 1-10
-    }},
-    
-    "содержание": {{
-        "основные_идеи": ["идея 1", "идея 2", "идея 3"],
-        "примеры_и_доказательства": "есть ли подтверждение каждой идеи? достаточно?",
-        "пропуски_или_слабости": ["слабость 1", "слабость 2"] или [],
-        "оценка": число 1-10
-    }},
-    
-    "язык_и_доступность": {{
-        "уровень_сложности": "простой/средний/сложный",
-        "проблемные_места": ["термин который не объяснен", "слишком сложное предложение"] или [],
-        "оценка": число 1-10
-    }},
-    
-    "доставка_и_беглость": {{
-        "интерпретация_темпа": "{wpm:.1f} слов/мин означает {tempo_interpretation}",
-        "интерпретация_паразитов": "{fillers_per_100:.1f}/100 слов указывает на {filler_interpretation}",
-        "интерпретация_пауз": "паузы используются так. Это [хорошо/плохо] потому что [объяснение]",
-        "общая_оценка_доставки": "уверенный/нервный/размеренный голос, [почему?]",
-        "оценка": число 1-10
-    }},
-    
-    "сильные_стороны": [
-        "Сильная сторона 1 (с примером из текста выступления)",
-        "Сильная сторона 2",
-        "Сильная сторона 3"
-    ],
-    
-    "области_для_улучшения": [
-        {{
-            "проблема": "ЧТО нужно улучшить (четко и конкретно)",
-            "причина": "ПОЧЕМУ это проблема",
-            "решение": "КАК это исправить (действенный совет)"
-        }},
-        {{
-            "проблема": "...",
-            "причина": "...",
-            "решение": "..."
-        }}
-    ],
-    
-    "главные_рекомендации": [
-        "Рекомендация 1: [действенный совет, который можно выполнить за неделю]",
-        "Рекомендация 2: [...]",
-        "Рекомендация 3: [...]",
-        "Рекомендация 4: [...]"
-    ],
-    
-    "приоритет_развития": "Какой ОДИН навык улучшить в первую очередь? (с объяснением)",
-    
-    "уровень_уверенности": число от 0 до 1
-}}
-
-ВАЖНО: 
-- Каждое утверждение подкреплено примерами из транскрипта
-- Рекомендации действенные, не общие фразы
-- Баланс: 50% похвалы, 50% критики
-- Используй метрики как подтверждение выводов"""
+        prompt = _ANALYSIS_PROMPT_TEMPLATE.format_map({
+            "duration_sec": analysis_result.duration_sec,
+            "words_total": analysis_result.words_total,
+            "wpm": wpm,
+            "tempo_interpretation": tempo_interpretation,
+            "avg_phrase_len": avg_phrase_len,
+            "phrase_interpretation": phrase_interpretation,
+            "rhythm_variation": analysis_result.phrases.rhythm_variation,
+            "fillers_total": analysis_result.filler_words.total,
+            "fillers_per_100": fillers_per_100,
+            "filler_interpretation": filler_interpretation,
+            "filler_block": f"• Самые частые: {filler_items}" if filler_items else "",
+            "pauses_count": analysis_result.pauses.count,
+            "pauses_avg_sec": analysis_result.pauses.avg_sec,
+            "max_pause": max_pause,
+            "pause_interpretation": pause_interpretation,
+            "pauses_block": f"• {pauses_info}" if pauses_info else "",
+            "transcript": analysis_result.transcript,
+        })
 
         return prompt
 
+    async def warmup(self) -> None:
+        """Аутентификация и минимальный запрос к модели (прогрев соединения)"""
+        await self.authenticate()
+        response = await self.client.post(
+            f"{self.api_url}/chat/completions",
+            content=_json_dumps({
+                "model": self.model,
+                "messages": [{"role": "user", "content": "ping"}],
+                "max_tokens": 1,
+            }),
+            headers=self._api_headers(),
+        )
+        response.raise_for_status()
+
     async def close(self):
-        """Закрывает HTTP-клиент"""
+        """Закрывает общие HTTP-клиенты"""
         try:
-            await self.client.aclose()
-            logger.debug("GigaChat HTTP клиент закрыт")
+            await close_shared_clients()
+            logger.debug("GigaChat HTTP клиенты закрыты")
         except Exception as e:
             logger.debug(f"Ошибка закрытия HTTP клиента: {e}")
 
@@ -536,7 +741,6 @@ class GigaChatClient:
 
         import hashlib
         import json as _json
-        import asyncio as _asyncio
 
         def _ctx_key(c):
             s = _json.dumps({
@@ -606,11 +810,7 @@ class GigaChatClient:
             "response_format": {"type": "json_array"}
         }
 
-        headers = {
-            "Authorization": f"Bearer {self._access_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
+        headers = self._api_headers()
 
         # Retry loop
         max_retries = 3
@@ -618,13 +818,13 @@ class GigaChatClient:
         response = None
         for attempt in range(max_retries):
             try:
-                response = await self.client.post(chat_url, json=request_data, headers=headers)
+                response = await self.client.post(chat_url, content=_json_dumps(request_data), headers=headers)
                 if response.status_code == 200:
                     break
-                elif response.status_code in (429, 503):
-                    logger.warning(f"GigaChat rate-limited (status {response.status_code}), retrying in {backoff}s")
-                    await _asyncio.sleep(backoff)
-                    backoff *= 2
+                elif response.status_code in _RETRY_STATUS_CODES:
+                    delay = _retry_delay(response, attempt)
+                    logger.warning(f"GigaChat rate-limited (status {response.status_code}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
                     continue
                 else:
                     logger.error(f"GigaChat classify API error {response.status_code}: {response.text}")
@@ -632,12 +832,12 @@ class GigaChatClient:
             except httpx.ConnectError as e:
                 logger.warning(f"GigaChat classify connection error (attempt {attempt+1}): {e}")
                 logger.warning(f"Could not connect to GigaChat API at {chat_url}")
-                await _asyncio.sleep(backoff)
+                await asyncio.sleep(backoff)
                 backoff *= 2
                 continue
             except Exception as e:
                 logger.warning(f"GigaChat classify request failed (attempt {attempt+1}): {e}")
-                await _asyncio.sleep(backoff)
+                await asyncio.sleep(backoff)
                 backoff *= 2
                 continue
 
@@ -646,7 +846,7 @@ class GigaChatClient:
             return [dict(**c, is_filler=False, confidence=0.0) for c in contexts]
 
         try:
-            body = response.json()
+            body = _json_loads(response.content)
             if not body.get("choices"):
                 return [dict(**c, is_filler_context=False, score=0.0) for c in contexts]
 
@@ -751,7 +951,7 @@ class GigaChatClient:
 Проблемных моментов: {problem_count}
 
 === ТРАНСКРИПТ (первые 2500 символов) ===
-{transcript[:2500]}{'... [текст сокращен]' if len(transcript) > 2500 else ''}
+{_clip_transcript(transcript, 2500)}
 
 === ИНСТРУКЦИИ ДЛЯ АНАЛИЗА ===
 1. Проанализируй выступление с привязкой ко времени
@@ -807,11 +1007,11 @@ class GigaChatClient:
                 s = s[first:last+1]
 
             # Уберём возможные односторонние комменты и управляющие символы
-            s = re.sub(r'\s+//.*', '', s)
-            s = re.sub(r'\\n', ' ', s)
+            s = _LINE_COMMENT_RE.sub('', s)
+            s = s.replace('\\n', ' ')
 
             # Удаляем хвостовые запятые перед закрывающими скобками
-            s = re.sub(r',\s*(?=[}\]])', '', s)
+            s = _TRAILING_COMMA_RE.sub('', s)
 
             # Trim
             s = s.strip()
@@ -920,11 +1120,9 @@ class GigaChatClient:
         Returns:
             Словарь с распарсенными данными или None, если не удалось распарсить
         """
-        import copy
-        
         # Первая попытка: пробуем распарсить напрямую
         try:
-            return json.loads(content)
+            return _json_loads(content)
         except json.JSONDecodeError:
             pass
 
@@ -933,28 +1131,18 @@ class GigaChatClient:
         
         # Попытка с очищенным контентом
         try:
-            return json.loads(cleaned_content)
+            return _json_loads(cleaned_content)
         except json.JSONDecodeError:
             pass
 
         # Попытки с разными стратегиями очистки
-        strategies = [
-            # Стратегия 1: удалить строки комментариев
-            lambda s: re.sub(r'\s*//.*$', '', s, flags=re.MULTILINE),
-            # Стратегия 2: заменить одинарные кавычки на двойные в ключах и строковых значениях
-            lambda s: re.sub(r"'([^']*)':", r'"\1":', s),  # ключи
-            lambda s: re.sub(r":\s*'([^']*)'", r': "\1"', s),  # значения
-            # Стратегия 3: комбинация предыдущих
-            lambda s: re.sub(r'\s*//.*$', '', re.sub(r"'([^']*)':", r'"\1":', s), flags=re.MULTILINE),
-        ]
-        
         for attempt in range(max_retries):
-            for strategy in strategies:
+            for strategy in _JSON_REPAIR_STRATEGIES:
                 try:
                     processed_content = strategy(cleaned_content)
                     # Попробуем снова очистить после применения стратегии
                     processed_content = self._clean_json_response(processed_content)
-                    return json.loads(processed_content)
+                    return _json_loads(processed_content)
                 except (json.JSONDecodeError, TypeError):
                     continue
                     
@@ -1,3 +1,4 @@
+import io
 import os
 import shutil
 import tempfile
@@ -6,12 +7,15 @@ from typing import Optional
 import logging
 import time
 import asyncio
-import aiofiles
 import inspect
 
+import numpy as np
+
 from fastapi import UploadFile
 
-from app.services.audio_extractor_advanced import AdvancedFfmpegAudioExtractor, TimeoutException
+from app.services.audio_extractor import (
+    SAMPLE_RATE, PyAVAudioExtractor, VideoSource, create_audio_extractor, save_wav,
+)
 from app.services.transcriber import Transcriber
 from app.services.analyzer import SpeechAnalyzer, EnhancedAnalysisResult
 from app.services.gigachat import GigaChatClient
@@ -29,6 +33,87 @@ from app.core.validators import FileValidator
 
 logger = logging.getLogger(__name__)
 
+def _disk_fileno(f) -> Optional[int]:
+    """Дескриптор файла загрузки или None, если его нет (например, BytesIO).
+
+    У SpooledTemporaryFile в памяти fileno() сбрасывает буфер во временный
+    файл — это не больше порога спула (1 МБ в Starlette), дальше копирует ядро.
+    """
+    try:
+        return f.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _sendfile_upload(in_fd: int, dst: Path, size: int) -> int:
+    """Копирует файл с диска в dst через os.sendfile, без буферов в Python"""
+    with open(dst, "wb") as out_file:
+        out_fd = out_file.fileno()
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+    return offset
+
+
+def _copy_upload_file(src, dst: Path, max_size_bytes: int) -> int:
+    """Копирует файл загрузки в dst (в потоке); прерывается при превышении лимита.
+
+    Загрузку с файловым дескриптором копирует через os.sendfile;
+    иначе (или если sendfile недоступен) копирует порциями.
+    """
+    in_fd = _disk_fileno(src)
+    if in_fd is not None:
+        # Дописываем буфер Python в файл, чтобы ядро видело все данные
+        src.flush()
+        size = os.fstat(in_fd).st_size
+        if size > max_size_bytes:
+            raise FileTooLargeError(
+                file_size_mb=size / (1024 * 1024),
+                max_size_mb=settings.max_file_size_mb
+            )
+        if hasattr(os, "sendfile"):
+            try:
+                return _sendfile_upload(in_fd, dst, size)
+            except OSError as e:
+                logger.debug(f"sendfile недоступен, копируем порциями: {e}")
+
+    chunk_size = settings.upload_chunk_size_mb * 1024 * 1024
+    src.seek(0)
+    written = 0
+    try:
+        with open(dst, "wb") as out_file:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                # Проверка до записи: на диск попадает не больше лимита
+                if written > max_size_bytes:
+                    raise FileTooLargeError(
+                        file_size_mb=written / (1024 * 1024),
+                        max_size_mb=settings.max_file_size_mb
+                    )
+                out_file.write(chunk)
+    except BaseException:
+        # Недописанный файл сразу освобождает место, не дожидаясь очистки каталога
+        dst.unlink(missing_ok=True)
+        raise
+    return written
+
+
+# Фоновые задачи удаления рабочих каталогов: ссылки держим до завершения,
+# иначе незавершенную задачу может собрать сборщик мусора
+_cleanup_tasks: set[asyncio.Task] = set()
+
+# Префикс временных каталогов запросов (по нему их находит очистка в lifespan)
+_WORK_DIR_PREFIX = "speech_"
+
+# Размер заголовка WAV (PCM s16le, mono), который пишет save_wav
+_WAV_HEADER_BYTES = 44
+
 
 class SpeechAnalysisPipeline:
     def __init__(
@@ -40,7 +125,7 @@ class SpeechAnalysisPipeline:
         enable_metrics: bool = True,
         include_timings: bool = True,  # Новая опция
     ):
-        self.audio_extractor = AdvancedFfmpegAudioExtractor()
+        self.audio_extractor = create_audio_extractor()
         self.transcriber = transcriber
         self.analyzer = analyzer
         self.gigachat_client = gigachat_client
@@ -77,15 +162,18 @@ class SpeechAnalysisPipeline:
             # Валидация файла
             await self._validate_file(file)
 
+            # Токен GigaChat запрашиваем параллельно с извлечением аудио и транскрибацией
+            auth_task = self._start_gigachat_token_prefetch()
+
             # Создаем временные файлы
-            temp_video_path, temp_audio_path = await self._create_temp_files(file)
+            video, work_dir, temp_audio_path = await self._create_temp_files(file)
 
             try:
                 # 1) Извлечение аудио
                 if self.metrics_collector:
                     self.metrics_collector.start_subtask("audio_extraction")
 
-                await self._extract_audio(temp_video_path, temp_audio_path)
+                audio = await self._extract_audio(video, temp_audio_path)
 
                 if self.metrics_collector:
                     self.metrics_collector.end_subtask("audio_extraction")
@@ -94,7 +182,7 @@ class SpeechAnalysisPipeline:
                 if self.metrics_collector:
                     self.metrics_collector.start_subtask("transcription")
 
-                transcript = await self._transcribe_audio(temp_audio_path)
+                transcript = await self._transcribe_audio(temp_audio_path, audio)
 
                 if self.metrics_collector:
                     self.metrics_collector.end_subtask("transcription")
@@ -103,7 +191,7 @@ class SpeechAnalysisPipeline:
                 if self.metrics_collector:
                     self.metrics_collector.start_subtask("analysis")
 
-                result = await self._analyze_speech(transcript, temp_audio_path)
+                result = await self._analyze_speech(transcript, temp_audio_path, classify_fillers=False)
 
                 if self.metrics_collector:
                     self.metrics_collector.end_subtask("analysis")
@@ -111,9 +199,14 @@ class SpeechAnalysisPipeline:
                     if hasattr(result, 'duration_sec'):
                         self.metrics_collector._metrics["duration_sec"] = result.duration_sec
 
-                # 4) Расширенный анализ через GigaChat
+                # 4) LLM-классификация слов-паразитов и расширенный анализ GigaChat —
+                # независимые сетевые запросы, выполняем их параллельно
+                if auth_task is not None:
+                    await auth_task
+                stages = [self._classify_fillers_with_llm(result, transcript)]
                 if self.gigachat_client and settings.gigachat_enabled:
-                    result = await self._enhance_with_gigachat(result)
+                    stages.append(self._enhance_with_gigachat(result))
+                await asyncio.gather(*stages)
 
                 # Завершаем сбор метрик успехом
                 if self.metrics_collector:
@@ -122,8 +215,10 @@ class SpeechAnalysisPipeline:
                 logger.info(f"Анализ завершен успешно: {file.filename}")
                 return result
             finally:
-                # Очистка временных файлов
-                self._cleanup_temp_files(temp_video_path, temp_audio_path)
+                if auth_task is not None and not auth_task.done():
+                    auth_task.cancel()
+                # Очистка временных файлов — в фоне, не задерживая ответ
+                self._schedule_cleanup(work_dir)
         except Exception as e:
             # Завершаем сбор метрик с ошибкой
             if self.metrics_collector:
@@ -138,25 +233,31 @@ class SpeechAnalysisPipeline:
             except Exception:
                 pass
 
+    def _start_gigachat_token_prefetch(self) -> Optional[asyncio.Task]:
+        """Запускает получение токена GigaChat в фоне, если он понадобится"""
+        if not self.gigachat_client or not (settings.gigachat_enabled or settings.llm_fillers_enabled):
+            return None
+        if not self.gigachat_client.available:
+            return None
+        return asyncio.create_task(self._prefetch_gigachat_token())
+
+    async def _prefetch_gigachat_token(self) -> None:
+        """Получает токен заранее; при ошибке этапы GigaChat авторизуются сами"""
+        try:
+            await self.gigachat_client.authenticate()
+        except Exception as e:
+            logger.debug(f"Предварительная авторизация GigaChat не удалась: {e}")
+
     async def _start_metrics_collection(self, file: UploadFile):
         """Начинает сбор метрик"""
         if not self.metrics_collector:
             return
 
-        # Читаем размер файла
-        file_size = 0
-        try:
-            # Сохраняем текущую позицию
-            current_pos = await file.tell()
-
-            # Переходим в конец
-            await file.seek(0, 2)
-            file_size = await file.tell()
-
-            # Возвращаемся на место
-            await file.seek(current_pos)
-        except Exception as e:
-            logger.warning(f"Не удалось определить размер файла: {e}")
+        # Размер известен из UploadFile.size или fstat, без перемотки файла
+        file_size = self._upload_size(file)
+        if file_size is None:
+            logger.warning("Не удалось определить размер файла")
+            file_size = 0
 
         self.metrics_collector.start_processing(
             filename=file.filename or "unknown",
@@ -184,133 +285,148 @@ class SpeechAnalysisPipeline:
 
     async def _validate_file_size(self, file: UploadFile) -> None:
         """Проверяет размер файла"""
-        max_size_bytes = settings.max_file_size_mb * 1024 * 1024
+        max_size_bytes = settings.max_file_size_bytes
+
+        # Размер неизвестен — он проверяется потоково при сохранении
+        # (_save_upload_to_path), без чтения файла в память
+        file_size = self._upload_size(file)
+        if file_size is None:
+            return
+
+        if file_size > max_size_bytes:
+            file_size_mb = file_size / (1024 * 1024)
+            raise FileTooLargeError(
+                file_size_mb=file_size_mb,
+                max_size_mb=settings.max_file_size_mb
+            )
+
+        logger.info(f"Файл валиден: {file.filename}, размер: {file_size / (1024 * 1024):.2f} MB")
+
+    @staticmethod
+    def _upload_size(file: UploadFile) -> Optional[int]:
+        """Размер загрузки без чтения содержимого: UploadFile.size, fstat или seek/tell"""
+        file_size = getattr(file, 'size', None)
+        if file_size is not None:
+            return file_size
+
+        f = file.file
+        fd = _disk_fileno(f)
+        if fd is not None:
+            try:
+                return os.fstat(fd).st_size
+            except OSError:
+                pass
 
         try:
-            # Пытаемся получить размер из атрибута
-            if hasattr(file, 'size') and file.size is not None:
-                file_size = file.size
-            else:
-                # Читаем файл для определения размера
-                content = await file.read(max_size_bytes + 1)
-                file_size = len(content)
+            current_pos = f.tell()
+            file_size = f.seek(0, os.SEEK_END)
+            f.seek(current_pos)
+            return file_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return None
+
+    async def _create_temp_files(
+        self, file: UploadFile
+    ) -> tuple[VideoSource, Path, Path]:
+        """
+        Готовит источник видео и временные файлы для обработки.
 
-                # Возвращаем указатель в начало
+        Все файлы запроса лежат в одном временном каталоге, который
+        удаляется целиком (_cleanup_work_dir). Небольшие загрузки (до
+        UPLOAD_SPOOL_MAX_MB) при декодировании через PyAV читаются в память:
+        контейнер открывается из BytesIO, и копия видео на диск не пишется.
+        Возвращает (источник видео, рабочий каталог, путь к WAV).
+        """
+        work_dir = Path(tempfile.mkdtemp(prefix=_WORK_DIR_PREFIX))
+        temp_audio_path = work_dir / "audio.wav"
+        try:
+            spool_max_bytes = settings.upload_spool_max_mb * 1024 * 1024
+            file_size = self._upload_size(file)
+            if (isinstance(self.audio_extractor, PyAVAudioExtractor)
+                    and file_size is not None and file_size <= spool_max_bytes):
                 await file.seek(0)
+                video_bytes = await file.read()
+                logger.info(f"Файл обрабатывается в памяти: {len(video_bytes) / (1024 * 1024):.2f} MB")
+                return video_bytes, work_dir, temp_audio_path
 
-            if file_size > max_size_bytes:
-                file_size_mb = file_size / (1024 * 1024)
-                raise FileTooLargeError(
-                    file_size_mb=file_size_mb,
-                    max_size_mb=settings.max_file_size_mb
-                )
+            suffix = Path(file.filename or "video").suffix or ".mp4"
+            temp_video_path = work_dir / f"video{suffix}"
 
-            logger.info(f"Файл валиден: {file.filename}, размер: {file_size / (1024 * 1024):.2f} MB")
+            # Сохраняем загруженный файл
+            await self._save_upload_to_path(file, temp_video_path)
+        except BaseException:
+            self._schedule_cleanup(work_dir)
+            raise
 
-        except Exception as e:
-            logger.error(f"Ошибка проверки размера файла: {e}")
-            # Не блокируем выполнение из-за ошибки определения размера
+        return temp_video_path, work_dir, temp_audio_path
 
-    async def _create_temp_files(self, file: UploadFile) -> tuple[Path, Path]:
-        """Создает временные файлы для обработки"""
-        suffix = Path(file.filename or "video").suffix or ".mp4"
+    async def _extract_audio(self, video: VideoSource, audio_path: Path) -> np.ndarray:
+        """
+        Извлекает аудио из видео в память (PCM float32 16 кГц).
 
-        # Создаем временный видеофайл
-        tmp_video = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        temp_video_path = Path(tmp_video.name)
-        tmp_video.close()
+        WAV-файл пишется из уже полученного PCM только для анализаторов,
+        которые читают аудио с диска (паузы, VAD, громкость).
+        """
+        source_name = video.name if isinstance(video, Path) else "памяти"
+        logger.info(f"Извлечение аудио из {source_name}")
 
-        # Сохраняем загруженный файл
-        await self._save_upload_to_path(file, temp_video_path)
+        try:
+            audio = await self.audio_extractor.extract(video, timeout=300)
+            await asyncio.to_thread(save_wav, audio, audio_path)
 
-        # Путь для аудиофайла
-        temp_audio_path = temp_video_path.with_suffix(".wav")
+            # Валидация по уже полученному PCM: длительность и размер WAV
+            # считаются из длины массива, без повторного чтения файла
+            if audio.size == 0:
+                raise AnalysisError("Извлеченный аудиофайл пуст")
 
-        return temp_video_path, temp_audio_path
+            wav_size = _WAV_HEADER_BYTES + audio.size * 2
+            # Добавляем проверку на минимальный размер аудио для предотвращения анализа пустых аудио
+            if wav_size < 1024:  # Меньше 1KB - скорее всего пустое аудио
+                # Проверим, есть ли действительно звук в аудио
+                is_valid_audio, error_msg = self._validate_audio_content(audio)
+                if not is_valid_audio:
+                    raise AnalysisError(f"Аудиофайл не содержит речи или слишком короткий: {error_msg}")
 
-    async def _extract_audio(self, video_path: Path, audio_path: Path) -> None:
-        """Извлекает аудио из видео"""
-        logger.info(f"Извлечение аудио из {video_path.name}")
+            logger.info(f"Аудио извлечено: {wav_size:,} байт ({audio.size / SAMPLE_RATE:.1f}s)")
 
-        try:
-            # Extract audio in thread pool to avoid blocking event loop
-            await asyncio.to_thread(self.audio_extractor.extract, video_path, audio_path, 300)
-
-            # Дополнительная валидация аудиофайла
-            if audio_path.exists():
-                file_size = audio_path.stat().st_size
-                if file_size == 0:
-                    raise AnalysisError("Извлеченный аудиофайл пуст")
-                
-                # Добавляем проверку на минимальный размер аудиофайла для предотвращения анализа пустых аудио
-                if file_size < 1024:  # Меньше 1KB - скорее всего пустое аудио
-                    # Проверим, есть ли действительно звук в аудио
-                    is_valid_audio, error_msg = await self._validate_audio_content(audio_path)
-                    if not is_valid_audio:
-                        raise AnalysisError(f"Аудиофайл не содержит речи или слишком короткий: {error_msg}")
-                
-                logger.info(f"Аудио извлечено: {file_size:,} байт")
-            else:
-                raise AnalysisError("Аудиофайл не был создан")
+            return audio
 
-        except TimeoutException as e:
-            logger.error(f"Таймаут извлечения аудио: {e}")
-            raise AnalysisError(
-                "Извлечение аудио заняло слишком много времени")
         except Exception as e:
             logger.error(f"Ошибка извлечения аудио: {e}")
             raise AnalysisError(f"Не удалось извлечь аудио: {str(e)}")
     
-    async def _validate_audio_content(self, audio_path: Path) -> tuple[bool, str]:
-        """Проверяет содержимое аудиофайла на наличие речи"""
-        try:
-            import wave
-            import numpy as np
-            
-            # Открываем wav файл и проверяем его содержимое
-            with wave.open(str(audio_path), 'r') as wf:
-                frames = wf.getnframes()
-                sample_rate = wf.getframerate()
-                duration = frames / float(sample_rate)
-                
-                if duration < 0.1:  # Меньше 100 мс - слишком короткое аудио
-                    return False, "Аудио слишком короткое для анализа"
-                
-                # Читаем аудиоданные
-                raw_audio = wf.readframes(frames)
-                
-                # Конвертируем в numpy array для анализа
-                if wf.getsampwidth() == 2:  # 16-bit
-                    audio_array = np.frombuffer(raw_audio, dtype=np.int16)
-                elif wf.getsampwidth() == 4:  # 32-bit
-                    audio_array = np.frombuffer(raw_audio, dtype=np.int32)
-                else:
-                    return False, "Неподдерживаемый формат аудио"
-                
-                # Проверяем уровень громкости (RMS)
-                rms = np.sqrt(np.mean(audio_array.astype(np.float32) ** 2))
-                
-                # Если средняя громкость очень низкая, это может быть тишина
-                if rms < 50:  # Порог для определения "тишины"
-                    return False, "Аудио содержит в основном тишину"
-                
-                return True, "Аудио содержит звук"
-        except Exception as e:
-            logger.warning(f"Ошибка проверки содержимого аудио: {e}")
-            return False, f"Ошибка проверки аудио: {str(e)}"
+    @staticmethod
+    def _validate_audio_content(audio: np.ndarray) -> tuple[bool, str]:
+        """Проверяет извлеченное аудио (float32, 16 кГц) на наличие звука"""
+        duration = audio.size / float(SAMPLE_RATE)
+        if duration < 0.1:  # Меньше 100 мс - слишком короткое аудио
+            return False, "Аудио слишком короткое для анализа"
 
-    async def _transcribe_audio(self, audio_path: Path):
+        # Проверяем уровень громкости (RMS) в шкале int16
+        rms = float(np.sqrt(np.mean(np.square(audio, dtype=np.float32)))) * 32768.0
+
+        # Если средняя громкость очень низкая, это может быть тишина
+        if rms < 50:  # Порог для определения "тишины"
+            return False, "Аудио содержит в основном тишину"
+
+        return True, "Аудио содержит звук"
+
+    async def _transcribe_audio(self, audio_path: Path, audio: Optional[np.ndarray] = None):
         """Транскрибирует аудио (с таймингами слов)"""
         logger.info("Транскрибация аудио с таймингами слов...")
 
         try:
-            # Валидация аудиофайла перед транскрибацией
-            is_valid, error_msg = FileValidator.validate_audio_file(audio_path)
-            if not is_valid:
-                logger.warning(f"Аудиофайл не прошел валидацию: {error_msg}")
-
             # Run transcription in thread pool (faster-whisper is blocking)
-            transcript = await asyncio.to_thread(self.transcriber.transcribe, audio_path)
+            if audio is not None and hasattr(self.transcriber, "transcribe_array"):
+                # PCM уже в памяти — Whisper не перечитывает WAV с диска
+                transcript = await asyncio.to_thread(self.transcriber.transcribe_array, audio)
+            else:
+                # Валидация аудиофайла перед транскрибацией
+                is_valid, error_msg = FileValidator.validate_audio_file(audio_path)
+                if not is_valid:
+                    logger.warning(f"Аудиофайл не прошел валидацию: {error_msg}")
+
+                transcript = await asyncio.to_thread(self.transcriber.transcribe, audio_path)
 
             if not transcript.segments or not transcript.text.strip():
                 logger.warning("Транскрипт пуст или содержит только пробелы")
@@ -327,8 +443,18 @@ class SpeechAnalysisPipeline:
             raise TranscriptionError(
                 f"Не удалось транскрибировать аудио: {str(e)}")
 
-    async def _analyze_speech(self, transcript, audio_path: Path) -> EnhancedAnalysisResult:
-        """Анализирует речь с таймингами"""
+    async def _analyze_speech(
+        self,
+        transcript,
+        audio_path: Path,
+        classify_fillers: bool = True,
+    ) -> EnhancedAnalysisResult:
+        """
+        Анализирует речь с таймингами.
+
+        classify_fillers=False пропускает LLM-классификацию слов-паразитов —
+        analyze_upload запускает ее сам, параллельно с анализом GigaChat.
+        """
         logger.info("Анализ метрик речи с таймингами...")
 
         try:
@@ -364,63 +490,70 @@ class SpeechAnalysisPipeline:
 
             logger.info(f"Анализ завершен: {result.words_total} слов, темп: {result.words_per_minute:.1f} WPM")
 
-            # Optionally use LLM to classify filler words in context
-            if self.gigachat_client and settings.llm_fillers_enabled and result.timed_data.filler_words_detailed:
-                try:
-                    contexts = []
-                    # Build context windows around each filler
-                    for filler in result.timed_data.filler_words_detailed:
-                        # Find index of nearest word timing in the transcript
-                        ft = filler.timestamp
-                        nearest_idx = None
-                        min_diff = float('inf')
-                        for i, wt in enumerate(transcript.word_timings):
-                            diff = abs(wt.start - ft)
-                            if diff < min_diff:
-                                min_diff = diff
-                                nearest_idx = i
-                        # context: two words before and two after
-                        before_words = []
-                        after_words = []
-                        if nearest_idx is not None:
-                            for j in range(max(0, nearest_idx - 2), nearest_idx):
-                                before_words.append(transcript.word_timings[j].word)
-                            for j in range(nearest_idx + 1, min(len(transcript.word_timings), nearest_idx + 3)):
-                                after_words.append(transcript.word_timings[j].word)
-
-                        contexts.append({
-                            "word": filler.word,
-                            "exact_word": filler.exact_word,
-                            "timestamp": filler.timestamp,
-                            "context_before": " ".join(before_words),
-                            "context_after": " ".join(after_words)
-                        })
-
-                    classified = await self.gigachat_client.classify_fillers_context(contexts, cache=self.cache)
-                    if classified:
-                        # Apply classification results
-                        for idx, cl in enumerate(classified):
-                            if idx < len(result.timed_data.filler_words_detailed):
-                                fw = result.timed_data.filler_words_detailed[idx]
-                                # support multiple possible keys returned by LLM
-                                fw.context_score = cl.get("score", cl.get("confidence", cl.get("confidence_score")))
-                                fw.is_context_filler = cl.get("is_filler", cl.get("is_filler_context", False))
-
-                except Exception as e:
-                    logger.warning(f"LLM filler classification failed: {e}")
+            if classify_fillers:
+                await self._classify_fillers_with_llm(result, transcript)
             return result
 
         except Exception as e:
             logger.error(f"Ошибка анализа речи: {e}")
             raise AnalysisError(f"Не удалось проанализировать речь: {str(e)}")
 
+    async def _classify_fillers_with_llm(self, result: EnhancedAnalysisResult, transcript) -> None:
+        """Уточняет слова-паразиты по контексту через LLM (опционально)"""
+        if not (self.gigachat_client and settings.llm_fillers_enabled and result.timed_data.filler_words_detailed):
+            return
+
+        try:
+            contexts = []
+            # Build context windows around each filler
+            for filler in result.timed_data.filler_words_detailed:
+                # Find index of nearest word timing in the transcript
+                ft = filler.timestamp
+                nearest_idx = None
+                min_diff = float('inf')
+                for i, wt in enumerate(transcript.word_timings):
+                    diff = abs(wt.start - ft)
+                    if diff < min_diff:
+                        min_diff = diff
+                        nearest_idx = i
+                # context: two words before and two after
+                before_words = []
+                after_words = []
+                if nearest_idx is not None:
+                    for j in range(max(0, nearest_idx - 2), nearest_idx):
+                        before_words.append(transcript.word_timings[j].word)
+                    for j in range(nearest_idx + 1, min(len(transcript.word_timings), nearest_idx + 3)):
+                        after_words.append(transcript.word_timings[j].word)
+
+                contexts.append({
+                    "word": filler.word,
+                    "exact_word": filler.exact_word,
+                    "timestamp": filler.timestamp,
+                    "context_before": " ".join(before_words),
+                    "context_after": " ".join(after_words)
+                })
+
+            classified = await self.gigachat_client.classify_fillers_context(contexts, cache=self.cache)
+            if classified:
+                # Apply classification results
+                for idx, cl in enumerate(classified):
+                    if idx < len(result.timed_data.filler_words_detailed):
+                        fw = result.timed_data.filler_words_detailed[idx]
+                        # support multiple possible keys returned by LLM
+                        fw.context_score = cl.get("score", cl.get("confidence", cl.get("confidence_score")))
+                        fw.is_context_filler = cl.get("is_filler", cl.get("is_filler_context", False))
+
+        except Exception as e:
+            logger.warning(f"LLM filler classification failed: {e}")
+
     async def _enhance_with_gigachat(self, result: EnhancedAnalysisResult) -> EnhancedAnalysisResult:
         """Добавляет анализ от GigaChat"""
         logger.info("Запрос расширенного анализа через GigaChat...")
 
         try:
-            # Создаем базовый AnalysisResult для GigaChat
-            base_result = AnalysisResult(
+            # Базовый AnalysisResult для GigaChat: поля уже провалидированы
+            # в EnhancedAnalysisResult, поэтому собираем модель без повторной валидации
+            base_result = AnalysisResult.model_construct(
                 duration_sec=result.duration_sec,
                 speaking_time_sec=result.speaking_time_sec,
                 speaking_ratio=result.speaking_ratio,
@@ -452,26 +585,30 @@ class SpeechAnalysisPipeline:
 
     @staticmethod
     async def _save_upload_to_path(upload: UploadFile, dst: Path) -> None:
-        """Сохраняет загруженный файл"""
-        await upload.seek(0)
-        # Используем aiofiles для асинхронной записи на диск
-        chunk_size = 1024 * 1024  # 1 MB
-        async with aiofiles.open(str(dst), "wb") as out_file:
-            while True:
-                chunk = await upload.read(chunk_size)
-                if not chunk:
-                    break
-                await out_file.write(chunk)
-        logger.info(f"Файл сохранен: {dst}")
+        """Сохраняет загруженный файл, проверяя размер на лету.
+
+        Копирование целиком выполняется одной задачей в пуле потоков:
+        без перехода в event loop на каждую порцию.
+        """
+        max_size_bytes = settings.max_file_size_bytes
+        written = await asyncio.to_thread(
+            _copy_upload_file, upload.file, dst, max_size_bytes)
+        logger.info(f"Файл сохранен: {dst} ({written / (1024 * 1024):.2f} MB)")
+
+    def _schedule_cleanup(self, work_dir: Path) -> None:
+        """Удаляет рабочий каталог в пуле потоков, не дожидаясь завершения"""
+        task = asyncio.create_task(asyncio.to_thread(self._cleanup_work_dir, work_dir))
+        _cleanup_tasks.add(task)
+        task.add_done_callback(_cleanup_tasks.discard)
 
     @staticmethod
-    def _cleanup_temp_files(*paths: Path) -> None:
-        """Удаляет временные файлы"""
-        for path in paths:
-            try:
-                if path.exists():
-                    path.unlink()
-                    logger.debug(f"Удален временный файл: {path}")
-            except Exception as e:
-                logger.warning(
-                    f"Не удалось удалить временный файл {path}: {e}")
+    def _cleanup_work_dir(work_dir: Path) -> None:
+        """Удаляет рабочий каталог запроса вместе с временными файлами"""
+        try:
+            shutil.rmtree(work_dir)
+            logger.debug(f"Удален временный каталог: {work_dir}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(
+                f"Не удалось удалить временный каталог {work_dir}: {e}")
@@ -31,62 +31,75 @@ class AdvancedSpeechAnalysisPipeline(BasePipeline):
         Анализирует файл с полными таймингами.
         """
         # Используем базовый пайплайн для извлечения и транскрипции
-        temp_video_path, temp_audio_path = await self._create_temp_files(file)
+        video, work_dir, temp_audio_path = await self._create_temp_files(file)
+
+        # Токен GigaChat запрашиваем параллельно с извлечением аудио и транскрибацией
+        auth_task = self._start_gigachat_token_prefetch()
 
         try:
             # 1. Извлечение аудио
-            await self._extract_audio(temp_video_path, temp_audio_path)
+            audio = await self._extract_audio(video, temp_audio_path)
 
             # 2. Транскрипция с таймингами
-            transcript = await self._transcribe_audio(temp_audio_path)
+            transcript = await self._transcribe_audio(temp_audio_path, audio)
 
             # 3. Продвинутый анализ с таймингами (передаем путь к аудио для RMS-показателей)
             result = await self.advanced_analyzer.analyze_with_timings(transcript, temp_audio_path)
 
-            # 4. GigaChat анализ (если включен)
+            # 4. GigaChat анализ и LLM-классификация слов-паразитов — независимые
+            # сетевые запросы, выполняем их параллельно
+            if auth_task is not None:
+                await auth_task
+            stages = [self._classify_fillers_with_llm_advanced(result, transcript)]
             if self.gigachat_client:
-                result = await self._enhance_with_gigachat_advanced(result)
-
-            # Используем LLM для классификации слов-паразитов по контексту (если включено)
-            if self.gigachat_client and settings.llm_fillers_enabled and result.timeline.fillers:
-                try:
-                    contexts = []
-                    for filler in result.timeline.fillers:
-                        # find index of word timing closest to filler.timestamp
-                        nearest_idx = None
-                        min_diff = float('inf')
-                        for i, wt in enumerate(transcript.word_timings):
-                            diff = abs(wt.start - filler.timestamp)
-                            if diff < min_diff:
-                                min_diff = diff
-                                nearest_idx = i
-                        before_words = []
-                        after_words = []
-                        if nearest_idx is not None:
-                            for j in range(max(0, nearest_idx - 2), nearest_idx):
-                                before_words.append(transcript.word_timings[j].word)
-                            for j in range(nearest_idx + 1, min(len(transcript.word_timings), nearest_idx + 3)):
-                                after_words.append(transcript.word_timings[j].word)
-                        contexts.append({
-                            "word": filler.word,
-                            "exact_word": filler.exact_word,
-                            "timestamp": filler.timestamp,
-                            "context_before": " ".join(before_words),
-                            "context_after": " ".join(after_words)
-                        })
-                    classified = await self.gigachat_client.classify_fillers_context(contexts, cache=self.cache)
-                    if classified:
-                        for idx, cl in enumerate(classified):
-                            if idx < len(result.timeline.fillers):
-                                result.timeline.fillers[idx].is_context_filler = cl.get('is_filler', cl.get('is_filler_context', False))
-                                result.timeline.fillers[idx].context_score = cl.get('score', cl.get('confidence', cl.get('confidence_score')))
-                except Exception as e:
-                    logger.warning(f"LLM filler classification (advanced) failed: {e}")
+                stages.append(self._enhance_with_gigachat_advanced(result))
+            await asyncio.gather(*stages)
 
             return result
 
         finally:
-            self._cleanup_temp_files(temp_video_path, temp_audio_path)
+            if auth_task is not None and not auth_task.done():
+                auth_task.cancel()
+            self._schedule_cleanup(work_dir)
+
+    async def _classify_fillers_with_llm_advanced(self, result: TimedAnalysisResult, transcript) -> None:
+        """Уточняет слова-паразиты таймлайна по контексту через LLM (если включено)"""
+        if not (self.gigachat_client and settings.llm_fillers_enabled and result.timeline.fillers):
+            return
+
+        try:
+            contexts = []
+            for filler in result.timeline.fillers:
+                # find index of word timing closest to filler.timestamp
+                nearest_idx = None
+                min_diff = float('inf')
+                for i, wt in enumerate(transcript.word_timings):
+                    diff = abs(wt.start - filler.timestamp)
+                    if diff < min_diff:
+                        min_diff = diff
+                        nearest_idx = i
+                before_words = []
+                after_words = []
+                if nearest_idx is not None:
+                    for j in range(max(0, nearest_idx - 2), nearest_idx):
+                        before_words.append(transcript.word_timings[j].word)
+                    for j in range(nearest_idx + 1, min(len(transcript.word_timings), nearest_idx + 3)):
+                        after_words.append(transcript.word_timings[j].word)
+                contexts.append({
+                    "word": filler.word,
+                    "exact_word": filler.exact_word,
+                    "timestamp": filler.timestamp,
+                    "context_before": " ".join(before_words),
+                    "context_after": " ".join(after_words)
+                })
+            classified = await self.gigachat_client.classify_fillers_context(contexts, cache=self.cache)
+            if classified:
+                for idx, cl in enumerate(classified):
+                    if idx < len(result.timeline.fillers):
+                        result.timeline.fillers[idx].is_context_filler = cl.get('is_filler', cl.get('is_filler_context', False))
+                        result.timeline.fillers[idx].context_score = cl.get('score', cl.get('confidence', cl.get('confidence_score')))
+        except Exception as e:
+            logger.warning(f"LLM filler classification (advanced) failed: {e}")
 
     async def _enhance_with_gigachat_advanced(self, result: TimedAnalysisResult) -> TimedAnalysisResult:
         """Расширенный анализ через GigaChat с учетом таймингов"""
@@ -1,8 +1,12 @@
 import hashlib
 import logging
 import pickle
+import time
+import wave
 from pathlib import Path
-from typing import Protocol, List
+from typing import Protocol, List, Union
+
+import numpy as np
 
 from app.core.config import settings
 
@@ -10,19 +14,32 @@ try:
     from faster_whisper import WhisperModel
     _FASTER_WHISPER_AVAILABLE = True
     _IMPORT_ERROR = None
+    try:
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:  # faster-whisper < 1.1
+        BatchedInferencePipeline = None
 except (ImportError, ModuleNotFoundError, RuntimeError) as e:
     _FASTER_WHISPER_AVAILABLE = False
     WhisperModel = None
+    BatchedInferencePipeline = None
     _IMPORT_ERROR = str(e)
 from app.models.transcript import Transcript, TranscriptSegment, WordTiming
 
 logger = logging.getLogger(__name__)
 
+SAMPLE_RATE = 16000
+
+# На коротких записях батчинг почти не дает выигрыша (VAD выделяет 1-2 чанка)
+_BATCHED_MIN_DURATION_SEC = 30.0
+
 
 class Transcriber(Protocol):
     def transcribe(self, audio_path: Path) -> Transcript:
         ...
 
+    def transcribe_array(self, audio: np.ndarray) -> Transcript:
+        ...
+
 
 class LocalWhisperTranscriber:
     """
@@ -37,12 +54,15 @@ class LocalWhisperTranscriber:
         compute_type: str | None = None,
         cache_dir: Path | None = None,
         cache_ttl: int = 3600,  # 1 hour default
+        batch_size: int | None = None,
     ):
         self.model_size = model_size or settings.whisper_model
         self.device = device or settings.whisper_device
         self.compute_type = compute_type or settings.whisper_compute_type
         self.cache_dir = cache_dir or Path(settings.cache_dir) / "transcriptions"
         self.cache_ttl = cache_ttl
+        self.batch_size = batch_size or settings.whisper_batch_size
+        self._batched = None
         
         # Создаем директорию для кэша транскрипций
         self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -65,9 +85,14 @@ class LocalWhisperTranscriber:
                     self.model_size,
                     device=self.device,
                     compute_type=self.compute_type,
+                    cpu_threads=settings.whisper_cpu_threads,
+                    num_workers=settings.whisper_num_workers,
                 )
                 logger.info(f"✅ Whisper model '{self.model_size}' loaded successfully on {self.device}")
                 self._model_available = True
+                if BatchedInferencePipeline is not None and self.batch_size > 1:
+                    self._batched = BatchedInferencePipeline(model=self.model)
+                    logger.info(f"Batched inference enabled (batch_size={self.batch_size})")
             except Exception as e:
                 # If model cannot be downloaded/loaded (no internet or gated model),
                 # gracefully fall back to a no-op transcriber that returns an
@@ -87,6 +112,12 @@ class LocalWhisperTranscriber:
         cache_key = f"{file_hash}_{self.model_size}_{self.device}_{self.compute_type}"
         return hashlib.sha256(cache_key.encode()).hexdigest()
 
+    def _get_array_cache_key(self, audio: np.ndarray) -> str:
+        """Генерирует ключ кеша на основе PCM-данных и параметров модели"""
+        audio_hash = hashlib.sha256(np.ascontiguousarray(audio).data).hexdigest()
+        cache_key = f"{audio_hash}_{self.model_size}_{self.device}_{self.compute_type}"
+        return hashlib.sha256(cache_key.encode()).hexdigest()
+
     def _get_cache_path(self, key: str) -> Path:
         """Возвращает путь к файлу кеша"""
         return self.cache_dir / f"{key}.pkl"
@@ -96,85 +127,170 @@ class LocalWhisperTranscriber:
         Транскрибация с таймингами для каждого слова.
         faster-whisper поддерживает word_timestamps=True
         """
-        # Генерируем ключ кеша
         cache_key = self._get_cache_key(audio_path)
+        return self._transcribe_cached(cache_key, str(audio_path), audio_path.name)
+
+    def transcribe_array(self, audio: np.ndarray) -> Transcript:
+        """
+        Транскрибация PCM-массива (float32, моно 16 кГц), полученного из ffmpeg
+        без промежуточного WAV-файла.
+        """
+        cache_key = self._get_array_cache_key(audio)
+        return self._transcribe_cached(cache_key, audio, f"<pcm {len(audio) / SAMPLE_RATE:.1f}s>")
+
+    @staticmethod
+    def _get_duration(audio: Union[str, np.ndarray]) -> float | None:
+        """Длительность аудио в секундах (None, если определить не удалось)"""
+        if isinstance(audio, np.ndarray):
+            return len(audio) / SAMPLE_RATE
+        try:
+            with wave.open(audio, 'rb') as wf:
+                return wf.getnframes() / float(wf.getframerate())
+        except (wave.Error, OSError, EOFError):
+            return None
+
+    def warmup(self) -> float:
+        """
+        Прогревает модель на тишине (без кеша) и возвращает время прогрева.
+
+        Первый вызов модели платит за выбор алгоритмов cuDNN, аллокатор и
+        инициализацию ядер CTranslate2 — переносим это с первого запроса
+        на старт приложения. VAD отключен, иначе тишина не дойдет до модели.
+        """
+        if not (self._model_available and self.model is not None):
+            return 0.0
+
+        started = time.perf_counter()
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        segments, _ = self.model.transcribe(silence, beam_size=5, word_timestamps=True, vad_filter=False)
+        list(segments)
+
+        if self._batched is not None:
+            segments, _ = self._batched.transcribe(
+                silence, beam_size=5, word_timestamps=True, vad_filter=False, batch_size=1)
+            list(segments)
+            if self.device != "cpu" and self.batch_size > 1:
+                # Полный батч на GPU: резервируем память под максимальный размер.
+                # На CPU это стоило бы batch_size полных окон энкодера — пропускаем
+                window = 30 * SAMPLE_RATE
+                clips = [
+                    {"start": i * window, "end": i * window + window - SAMPLE_RATE}
+                    for i in range(self.batch_size)
+                ]
+                segments, _ = self._batched.transcribe(
+                    np.zeros(window * self.batch_size, dtype=np.float32),
+                    beam_size=5,
+                    vad_filter=False,
+                    clip_timestamps=clips,
+                    batch_size=self.batch_size,
+                )
+                list(segments)
+
+        return time.perf_counter() - started
+
+    def _load_cached(self, cache_key: str, source_name: str) -> Transcript | None:
+        """Возвращает закэшированный транскрипт, если он есть и не просрочен"""
         cache_path = self._get_cache_path(cache_key)
-        
-        # Проверяем наличие закэшированного результата
-        if cache_path.exists():
-            try:
-                import time
-                # Проверяем TTL
-                mtime = cache_path.stat().st_mtime
-                if time.time() - mtime <= self.cache_ttl:
-                    with open(cache_path, 'rb') as f:
-                        cached_result = pickle.load(f)
-                        logger.info(f"Using cached transcription for: {audio_path.name}")
-                        return cached_result
-                else:
-                    # Удаляем просроченный кеш
-                    cache_path.unlink()
-            except Exception as e:
-                logger.warning(f"Error reading cached transcription: {e}")
-        
-        logger.info(f"Transcribing audio with word timings: {audio_path}")
-        segments: List[TranscriptSegment] = []
-        all_word_timings: List[WordTiming] = []
-        full_text = ""
+        try:
+            # Проверяем TTL (отсутствующий файл — промах, без отдельной проверки exists)
+            mtime = cache_path.stat().st_mtime
+            if time.time() - mtime <= self.cache_ttl:
+                with open(cache_path, 'rb') as f:
+                    cached_result = pickle.load(f)
+                    logger.info(f"Using cached transcription for: {source_name}")
+                    return cached_result
+            # Удаляем просроченный кеш
+            cache_path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error reading cached transcription: {e}")
+        return None
+
+    def _save_cached(self, cache_key: str, transcript: Transcript) -> None:
+        """Сохраняет результат в кеш"""
+        cache_path = self._get_cache_path(cache_key)
+        try:
+            with open(cache_path, 'wb') as f:
+                pickle.dump(transcript, f, protocol=pickle.HIGHEST_PROTOCOL)
+            logger.debug(f"Cached transcription: {cache_path}")
+        except Exception as e:
+            logger.warning(f"Error saving cached transcription: {e}")
 
-        if self._model_available and self.model is not None:
+    def _run_model(self, audio: Union[str, np.ndarray]) -> Transcript:
+        """Запускает Whisper и собирает транскрипт с таймингами слов"""
+        if not (self._model_available and self.model is not None):
+            # Offline/dummy fallback: return empty transcript (but still cacheable)
+            logger.info("Model unavailable — returning empty transcript (dummy).")
+            return Transcript(text="", segments=[], word_timings=[])
+
+        duration = self._get_duration(audio)
+        if self._batched is not None and (duration is None or duration >= _BATCHED_MIN_DURATION_SEC):
+            # VAD-чанки декодируются батчами — заметно быстрее на длинных записях
+            segments_iter, info = self._batched.transcribe(
+                audio,
+                beam_size=5,
+                word_timestamps=True,
+                vad_filter=True,
+                batch_size=self.batch_size,
+            )
+        else:
             # segments — генератор, info — объект с метаданными
             segments_iter, info = self.model.transcribe(
-                str(audio_path),
+                audio,
                 beam_size=5,
                 word_timestamps=True,  # ← Ключевой параметр для таймингов слов!
                 vad_filter=True,  # Фильтрация голосовой активности
             )
 
-            texts: List[str] = []
-            for seg in segments_iter:
-                words_in_segment: List[WordTiming] = []
-
-                # seg.words содержит список объектов с start, end, word
-                if hasattr(seg, 'words') and seg.words:
-                    for word_info in seg.words:
-                        word_timing = WordTiming(
-                            word=word_info.word,
-                            start=float(word_info.start),
-                            end=float(word_info.end),
-                            confidence=getattr(word_info, 'probability', None)
-                        )
-                        words_in_segment.append(word_timing)
-                        all_word_timings.append(word_timing)
-
-                segment = TranscriptSegment(
-                    start=float(seg.start),
-                    end=float(seg.end),
-                    text=seg.text,
-                    words=words_in_segment
-                )
-                segments.append(segment)
-                texts.append(seg.text)
+        segments: List[TranscriptSegment] = []
+        all_word_timings: List[WordTiming] = []
+        texts: List[str] = []
+        for seg in segments_iter:
+            words_in_segment: List[WordTiming] = []
 
-            full_text = " ".join(texts).strip()
+            # seg.words содержит список объектов с start, end, word
+            if hasattr(seg, 'words') and seg.words:
+                for word_info in seg.words:
+                    word_timing = WordTiming(
+                        word=word_info.word,
+                        start=float(word_info.start),
+                        end=float(word_info.end),
+                        confidence=getattr(word_info, 'probability', None)
+                    )
+                    words_in_segment.append(word_timing)
+                    all_word_timings.append(word_timing)
 
-            logger.info(f"Transcription complete: {len(segments)} segments, {len(all_word_timings)} word timings")
-            transcript = Transcript(
-                text=full_text,
-                segments=segments,
-                word_timings=all_word_timings
+            segment = TranscriptSegment(
+                start=float(seg.start),
+                end=float(seg.end),
+                text=seg.text,
+                words=words_in_segment
             )
-        else:
-            # Offline/dummy fallback: return empty transcript (but still cacheable)
-            logger.info("Model unavailable — returning empty transcript (dummy).")
-            transcript = Transcript(text="", segments=[], word_timings=[])
-        
-        # Сохраняем результат в кеш
-        try:
-            with open(cache_path, 'wb') as f:
-                pickle.dump(transcript, f, protocol=pickle.HIGHEST_PROTOCOL)
-            logger.debug(f"Cached transcription: {cache_path}")
-        except Exception as e:
-            logger.warning(f"Error saving cached transcription: {e}")
+            segments.append(segment)
+            texts.append(seg.text)
+
+        full_text = " ".join(texts).strip()
+
+        logger.info(f"Transcription complete: {len(segments)} segments, {len(all_word_timings)} word timings")
+        return Transcript(
+            text=full_text,
+            segments=segments,
+            word_timings=all_word_timings
+        )
+
+    def _transcribe_cached(
+        self,
+        cache_key: str,
+        audio: Union[str, np.ndarray],
+        source_name: str,
+    ) -> Transcript:
+        """Общая логика транскрибации с кешем результата"""
+        cached = self._load_cached(cache_key, source_name)
+        if cached is not None:
+            return cached
 
+        logger.info(f"Transcribing audio with word timings: {source_name}")
+        transcript = self._run_model(audio)
+        self._save_cached(cache_key, transcript)
         return transcript
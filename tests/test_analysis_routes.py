@@ -0,0 +1,125 @@
+"""Tests for analysis routes."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes.analysis import router
+from app.core.config import settings
+from app.core.middleware import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware
+from app.models.analysis import AnalysisResult
+from app.services.analyzer import EnhancedAnalysisResult, SpeechAnalyzer
+
+MB = 1024 * 1024
+
+
+class RecordingPipeline:
+    def __init__(self):
+        self.uploads = []
+
+    async def analyze_upload(self, file):
+        self.uploads.append((file.filename, file.size, await file.read()))
+        return AnalysisResult.model_construct(duration_sec=1.0)
+
+
+@pytest.fixture
+def pipeline():
+    return RecordingPipeline()
+
+
+@pytest.fixture
+def client(pipeline):
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(UploadSizeLimitMiddleware)
+    app.state.pipeline = pipeline
+    return TestClient(app)
+
+
+def test_analyze_raw_passes_body_and_filename(client, pipeline):
+    body = b"\x00video" * 1000
+
+    response = client.post(
+        "/api/analyze/raw",
+        content=body,
+        headers={"X-Filename": "%D0%B4%D0%BE%D0%BA%D0%BB%D0%B0%D0%B4.mp4"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["duration_sec"] == 1.0
+    assert pipeline.uploads == [("доклад.mp4", len(body), body)]
+
+
+@pytest.fixture
+def one_mb_limit(monkeypatch):
+    monkeypatch.setattr(settings, "max_file_size_mb", 1)
+
+
+def test_oversized_content_length_rejected_before_route(client, pipeline, one_mb_limit):
+    response = client.post(
+        "/api/analyze/raw", content=b"x" * (MB + MULTIPART_OVERHEAD_BYTES + 1))
+
+    assert response.status_code == 413
+    assert response.json()["error_type"] == "FileTooLargeError"
+    assert response.json()["max_size_mb"] == 1
+    assert pipeline.uploads == []
+
+
+def test_multipart_overhead_allowance_passes(client, pipeline, one_mb_limit):
+    body = b"x" * MB
+
+    # Файл ровно в лимит: Content-Length больше лимита на границы multipart
+    response = client.post("/api/analyze", files={"file": ("talk.mp4", body, "video/mp4")})
+
+    assert response.status_code == 200
+    assert pipeline.uploads == [("talk.mp4", MB, body)]
+
+
+@pytest.mark.parametrize("headers", [{}, {"Content-Length": "abc"}])
+def test_missing_or_invalid_content_length_passes_through(client, pipeline, one_mb_limit, headers):
+    body = b"\x00video"
+    # Генератор отправляется chunked, без Content-Length
+    content = body if headers else iter([body])
+
+    response = client.post("/api/analyze/raw", content=content, headers=headers)
+
+    assert response.status_code == 200
+    assert pipeline.uploads == [(None, len(body), body)]
+
+
+def test_analyze_returns_analysis_result_json(client, pipeline, monkeypatch):
+    result = EnhancedAnalysisResult(
+        **SpeechAnalyzer()._empty_analysis_result("привет").model_dump())
+
+    async def analyze_upload(file):
+        return result
+
+    monkeypatch.setattr(pipeline, "analyze_upload", analyze_upload)
+
+    response = client.post("/api/analyze", files={"file": ("talk.mp4", b"video", "video/mp4")})
+
+    assert response.status_code == 200
+    data = response.json()
+    # Только поля AnalysisResult: timed_data из EnhancedAnalysisResult не попадает в ответ
+    assert set(data) == set(AnalysisResult.model_fields)
+    assert isinstance(data["duration_sec"], float)
+    assert isinstance(data["words_total"], int)
+    assert isinstance(data["filler_words"], dict)
+    assert isinstance(data["pauses"]["long_pauses"], list)
+    assert isinstance(data["advice"], list) and isinstance(data["advice"][0]["title"], str)
+    assert data["transcript"] == "привет"
+    assert data["gigachat_analysis"] is None
+
+
+def test_analyze_documents_analysis_result_schema(client):
+    operation = client.get("/openapi.json").json()["paths"]["/api/analyze"]["post"]
+
+    schema = operation["responses"]["200"]["content"]["application/json"]["schema"]
+    assert schema["$ref"].endswith("/AnalysisResult")
+
+
+def test_app_keeps_default_response_class_for_response_model_fast_path():
+    from fastapi.datastructures import DefaultPlaceholder
+    from app.main import app as main_app
+
+    # Явный default_response_class отключил бы сериализацию через pydantic-core
+    assert isinstance(main_app.router.default_response_class, DefaultPlaceholder)
@@ -2,7 +2,10 @@ import wave
 import struct
 import math
 from pathlib import Path
-from app.services.analyzer import SpeechAnalyzer, MIN_PAUSE_GAP_SEC
+import numpy as np
+import pytest
+from app.services import analyzer as analyzer_module
+from app.services.analyzer import SpeechAnalyzer, MIN_PAUSE_GAP_SEC, _PauseAudio, _load_pcm16_mono
 from app.core.config import settings
 from app.models.transcript import Transcript, TranscriptSegment, WordTiming
 
@@ -132,7 +135,47 @@ def test_filler_cluster_detection():
     assert any(len(c) >= 2 for c in clusters)
 
 
-import pytest
+@pytest.fixture(params=["regex", "automaton"])
+def filler_matching(request, monkeypatch):
+    """Прогоняет тест и на автомате Ахо-Корасик, и на запасных регулярках"""
+    if request.param == "automaton":
+        pytest.importorskip("ahocorasick")
+        assert analyzer_module.FILLER_AUTOMATON is not None
+    else:
+        monkeypatch.setattr(analyzer_module, "ahocorasick", None)
+        monkeypatch.setattr(analyzer_module, "_AHOCORASICK_AVAILABLE", False)
+        monkeypatch.setattr(analyzer_module, "FILLER_AUTOMATON", None)
+        monkeypatch.setattr(analyzer_module, "AUTOMATON_FILLER_NAMES", frozenset())
+    return request.param
+
+
+def test_count_fillers_respects_word_boundaries_and_overlaps(filler_matching):
+    text = "Ну, вроде бы тамада пришла, то есть ну-ну... Короче говоря, эээ"
+    total, counts = SpeechAnalyzer._count_fillers(text)
+
+    # "вроде" поглощает "вроде бы", "короче" - "короче говоря", "тамада" не "там"
+    assert counts == {"ну": 3, "вроде": 1, "короче": 1, "то есть": 1, "э-э": 1}
+    assert total == 7
+
+
+def test_count_fillers_automaton_matches_regex_fallback(monkeypatch):
+    pytest.importorskip("ahocorasick")
+    texts = [
+        "Ну, вроде бы тамада пришла, то есть ну-ну... Короче говоря, эээ",
+        "Как бы это сказать, типа, в общем, значит, так сказать, ммм",
+        "Там, собственно, вот это вот и есть, ну, понимаешь, ааа... блин",
+        "Безупречная речь без единого паразита",
+    ]
+    with_automaton = [SpeechAnalyzer._count_fillers(text) for text in texts]
+
+    monkeypatch.setattr(analyzer_module, "FILLER_AUTOMATON", None)
+    monkeypatch.setattr(analyzer_module, "AUTOMATON_FILLER_NAMES", frozenset())
+    with_regex = [SpeechAnalyzer._count_fillers(text) for text in texts]
+
+    assert with_automaton == with_regex
+    assert any(total for total, _ in with_automaton)
+
+
 from app.services.pipeline import SpeechAnalysisPipeline
 from app.services.analyzer import EnhancedAnalysisResult
 from app.models.timed_analysis import TimedAnalysisData
@@ -212,3 +255,89 @@ def test_vad_filters_pauses_monkeypatch(monkeypatch, tmp_path):
 
     # Because VAD reports speech within 0.5-1.05s overlapping the gap, pauses should be filtered out
     assert len(timed.pauses_detailed) == 0
+
+
+@pytest.mark.asyncio
+async def test_analyze_reads_audio_once_for_basic_and_timed(monkeypatch, tmp_path):
+    words = [WordTiming(word='один', start=0.0, end=0.3, confidence=0.95),
+             WordTiming(word='два', start=0.8, end=1.0, confidence=0.95)]
+    segments = [
+        TranscriptSegment(start=0.0, end=0.3, text='один', words=[words[0]]),
+        TranscriptSegment(start=0.8, end=1.0, text='два', words=[words[1]]),
+    ]
+    transcript = Transcript(text='один два', segments=segments, word_timings=words)
+    audio_file = tmp_path / 'test.wav'
+    create_test_wav(audio_file)
+
+    from app.services import vad
+    calls = []
+
+    def fake_detect(audio_path, use_pyannote, use_webrtc, webrtc_mode=None, pyannote_model=None):
+        calls.append(audio_path)
+        return []
+
+    monkeypatch.setattr(vad, 'detect_speech_regions', fake_detect)
+
+    result = await SpeechAnalyzer().analyze(transcript, audio_file, include_timings=True)
+
+    # Пауза 0.3–0.8 проверена обоими анализами по одному прочтению WAV и VAD
+    assert len(calls) == 1
+    assert result.pauses.count == 1
+    assert len(result.timed_data.pauses_detailed) == 1
+
+
+def _write_wav_with_list_chunk(path: Path, samples, sample_rate=16000):
+    """WAV с LIST/INFO-чанком перед data (так пишут многие редакторы): заголовок длиннее 44 байт"""
+    data = struct.pack(f'<{len(samples)}h', *samples)
+    fmt = struct.pack('<HHIIHH', 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    info = b'INFO' + b'ISFT' + struct.pack('<I', 6) + b'test\x00\x00'
+    chunks = (b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+              + b'LIST' + struct.pack('<I', len(info)) + info
+              + b'data' + struct.pack('<I', len(data)) + data)
+    path.write_bytes(b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WAVE' + chunks)
+
+
+def _reference_pcm16(path: Path):
+    """Прежний путь чтения: wave + np.frombuffer"""
+    with wave.open(str(path), 'rb') as wf:
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype='<i2'), wf.getframerate()
+
+
+@pytest.mark.parametrize('with_list_chunk', [False, True])
+def test_load_pcm16_mono_matches_wave_reader(monkeypatch, tmp_path, with_list_chunk):
+    from app.services import vad
+
+    audio_file = tmp_path / 'test.wav'
+    create_test_wav(audio_file)
+    if with_list_chunk:
+        samples, _ = _reference_pcm16(audio_file)
+        _write_wav_with_list_chunk(audio_file, samples.tolist())
+
+    loaded, framerate = _load_pcm16_mono(audio_file)
+    reference, reference_rate = _reference_pcm16(audio_file)
+
+    # Канонический заголовок читается через memmap, с LIST-чанком — через wave
+    assert isinstance(loaded, np.memmap) is not with_list_chunk
+    assert framerate == reference_rate
+    np.testing.assert_array_equal(np.asarray(loaded), reference)
+
+    # RMS через np.dot совпадает с поэлементным подсчетом
+    window = loaded[int(0.1 * framerate):int(0.3 * framerate)]
+    expected_rms = math.sqrt(sum(int(x) * int(x) for x in window) / len(window))
+    segment = window.astype(np.float64)
+    assert math.sqrt(float(np.dot(segment, segment)) / len(segment)) == pytest.approx(expected_rms)
+
+    # Фильтрация пауз дает тот же результат, что и по отсчетам из wave
+    monkeypatch.setattr(vad, 'detect_speech_regions', lambda *args, **kwargs: [])
+    segments = [TranscriptSegment(start=0.0, end=0.3, text='раз', words=[]),
+                TranscriptSegment(start=0.8, end=1.0, text='два', words=[])]
+    pauses = [{'start': 0.3, 'end': 0.8, 'duration': 0.5},
+              {'start': 0.1, 'end': 0.9, 'duration': 0.8},
+              {'start': 1.0, 'end': 2.0, 'duration': 1.0}]
+
+    filtered = SpeechAnalyzer._filter_noisy_pauses(audio_file, pauses, segments)
+    expected = SpeechAnalyzer._filter_noisy_pauses(
+        audio_file, pauses, segments, _PauseAudio(samples=reference, framerate=reference_rate))
+
+    assert filtered == expected
+    assert [p['start'] for p in filtered] == [0.3, 1.0]
@@ -0,0 +1,45 @@
+import sys
+
+import numpy as np
+import pytest
+
+from app.core.exceptions import AudioExtractionError
+from app.services.audio_extractor import FfmpegAudioExtractor
+
+
+def _fake_ffmpeg(tmp_path, body: str):
+    """Исполняемый скрипт вместо ffmpeg (на текущем интерпретаторе Python)"""
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!{sys.executable}\nimport sys\n{body}\n")
+    script.chmod(0o755)
+    return str(script)
+
+
+@pytest.mark.asyncio
+async def test_ffmpeg_failure_includes_stderr(tmp_path):
+    ffmpeg = _fake_ffmpeg(tmp_path, (
+        "assert sys.argv[sys.argv.index('-loglevel') + 1] == 'error'\n"
+        "sys.stdin.buffer.read()\n"
+        "sys.stderr.write('pipe:0: Invalid data found when processing input\\n')\n"
+        "sys.exit(183)"
+    ))
+
+    with pytest.raises(AudioExtractionError) as exc_info:
+        await FfmpegAudioExtractor(ffmpeg).extract(b"not a video")
+
+    assert "code: 183" in exc_info.value.detail
+    assert "Invalid data found when processing input" in exc_info.value.detail
+
+
+@pytest.mark.asyncio
+async def test_ffmpeg_pcm_read_from_stdout(tmp_path):
+    ffmpeg = _fake_ffmpeg(tmp_path, (
+        "import array\n"
+        "data = sys.stdin.buffer.read()\n"
+        "sys.stdout.buffer.write(array.array('f', [0.5] * len(data)).tobytes())"
+    ))
+
+    audio = await FfmpegAudioExtractor(ffmpeg).extract(b"x" * 1000)
+
+    assert audio.dtype == np.float32
+    np.testing.assert_array_equal(audio, np.full(1000, 0.5, dtype=np.float32))
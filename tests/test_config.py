@@ -0,0 +1,43 @@
+import pytest
+
+from app.core.config import Settings
+
+
+@pytest.fixture
+def make_settings(monkeypatch):
+    """Settings только из переданных переменных окружения (без .env)"""
+    for name in ("WHISPER_DEVICE", "WHISPER_COMPUTE_TYPE", "WHISPER_BATCH_SIZE"):
+        monkeypatch.delenv(name, raising=False)
+
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return Settings(_env_file=None)
+    return make
+
+
+@pytest.mark.parametrize("device, expected", [
+    ("cpu", "int8"),
+    ("cuda", "int8_float16"),
+    ("auto", "auto"),
+])
+def test_whisper_compute_type_auto_resolves_by_device(make_settings, device, expected):
+    assert make_settings(WHISPER_DEVICE=device).whisper_compute_type == expected
+
+
+def test_whisper_compute_type_explicit_value_is_kept(make_settings):
+    settings = make_settings(WHISPER_DEVICE="cuda", WHISPER_COMPUTE_TYPE="float16")
+
+    assert settings.whisper_compute_type == "float16"
+
+
+@pytest.mark.parametrize("device, expected", [("cpu", 8), ("cuda", 16), ("auto", 16)])
+def test_whisper_batch_size_default_depends_on_device(make_settings, device, expected):
+    assert make_settings(WHISPER_DEVICE=device).whisper_batch_size == expected
+
+
+def test_whisper_batch_size_explicit_and_invalid(make_settings):
+    assert make_settings(WHISPER_BATCH_SIZE="1").whisper_batch_size == 1
+
+    with pytest.raises(ValueError):
+        make_settings(WHISPER_BATCH_SIZE="0")
@@ -0,0 +1,190 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.lifespan import _token_refresh_delay
+from app.services import gigachat
+from app.services.gigachat import GigaChatClient
+
+
+@pytest.fixture
+def gigachat_client():
+    client = GigaChatClient(verify_ssl=False)
+    client.api_key = "test-key"
+    return client
+
+
+@pytest.fixture
+def mock_http(monkeypatch):
+    """Подменяет общий HTTP-клиент GigaChat клиентом с MockTransport"""
+    def install(handler):
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setitem(gigachat._shared_clients, True, http_client)
+        monkeypatch.setitem(gigachat._shared_clients, False, http_client)
+        return http_client
+    return install
+
+
+def test_store_token_expires_at_in_milliseconds(gigachat_client):
+    expires_at = time.time() + 1800
+
+    gigachat_client._store_token({"access_token": "tok", "expires_at": int(expires_at * 1000)})
+
+    assert gigachat_client._access_token == "tok"
+    assert gigachat_client._token_expires_at == pytest.approx(expires_at, abs=0.01)
+
+
+def test_store_token_expires_at_in_absolute_seconds(gigachat_client):
+    expires_at = time.time() + 1800
+
+    gigachat_client._store_token({"access_token": "tok", "expires_at": expires_at})
+
+    assert gigachat_client._token_expires_at == pytest.approx(expires_at)
+
+
+def test_store_token_expires_at_as_ttl(gigachat_client):
+    gigachat_client._store_token({"access_token": "tok", "expires_at": 1800})
+
+    assert gigachat_client._token_expires_at == pytest.approx(time.time() + 1800, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_authenticate_makes_single_token_request(gigachat_client, mock_http):
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        # Ответ не мгновенный: остальные вызовы успевают встать на блокировку
+        await asyncio.sleep(0.05)
+        expires_at = int((time.time() + 1800) * 1000)
+        return httpx.Response(200, json={"access_token": "tok", "expires_at": expires_at})
+
+    mock_http(handler)
+
+    await asyncio.gather(*(gigachat_client.authenticate() for _ in range(5)))
+
+    assert len(requests) == 1
+    assert gigachat_client._access_token == "tok"
+
+
+def test_cooldown_for_auth_failure_drops_token(gigachat_client):
+    gigachat_client._access_token = "tok"
+
+    gigachat_client._check_response_for_cooldown(httpx.Response(401))
+
+    assert gigachat_client._access_token is None
+    assert not gigachat_client.available
+    assert gigachat_client._unavailable_until == pytest.approx(time.monotonic() + 15.0, abs=1)
+
+
+@pytest.mark.parametrize("status_code, headers, expected", [
+    (429, {"Retry-After": "10"}, 10.0),
+    (503, {"Retry-After": "86400"}, 30.0),
+    (500, {}, 60.0),
+    (429, {"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"}, 60.0),
+])
+def test_cooldown_for_unavailable_statuses(status_code, headers, expected):
+    assert gigachat._cooldown_for(httpx.Response(status_code, headers=headers)) == expected
+
+
+def test_cooldown_for_other_client_errors_is_none(gigachat_client):
+    gigachat_client._check_response_for_cooldown(httpx.Response(400))
+
+    assert gigachat._cooldown_for(httpx.Response(400)) is None
+    assert gigachat_client.available
+
+
+@pytest.fixture
+def no_retry_wait(monkeypatch):
+    """Повторы без реального ожидания; возвращает список номеров попыток"""
+    attempts = []
+
+    def retry_delay(response, attempt):
+        attempts.append(attempt)
+        return 0.0
+
+    monkeypatch.setattr(gigachat, "_retry_delay", retry_delay)
+    monkeypatch.setattr(gigachat, "_RETRY_MAX_ATTEMPTS", 3)
+    return attempts
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status_code", [429, 503])
+async def test_post_with_retry_retries_rate_limit_and_unavailable(
+        gigachat_client, mock_http, no_retry_wait, status_code):
+    statuses = [status_code, status_code, 200]
+    mock_http(lambda request: httpx.Response(statuses.pop(0)))
+
+    response = await gigachat_client._post_with_retry("https://gigachat.test/api")
+
+    assert response.status_code == 200
+    assert no_retry_wait == [0, 1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status_code", [400, 401, 404])
+async def test_post_with_retry_does_not_retry_client_errors(
+        gigachat_client, mock_http, no_retry_wait, status_code):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(status_code)
+
+    mock_http(handler)
+
+    response = await gigachat_client._post_with_retry("https://gigachat.test/api")
+
+    assert response.status_code == status_code
+    assert len(requests) == 1
+    assert no_retry_wait == []
+
+
+@pytest.mark.asyncio
+async def test_post_with_retry_returns_last_response_after_max_attempts(
+        gigachat_client, mock_http, no_retry_wait):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(429)
+
+    mock_http(handler)
+
+    response = await gigachat_client._post_with_retry("https://gigachat.test/api")
+
+    assert response.status_code == 429
+    assert len(requests) == 3
+    assert no_retry_wait == [0, 1]
+
+
+def test_retry_delay_uses_capped_retry_after():
+    assert 5.0 <= gigachat._retry_delay(httpx.Response(429, headers={"Retry-After": "5"}), 0) < 6.0
+    assert 30.0 <= gigachat._retry_delay(httpx.Response(429, headers={"Retry-After": "600"}), 0) < 31.0
+
+
+def test_retry_delay_backs_off_exponentially_with_cap():
+    for attempt, base in [(0, 1.0), (2, 4.0), (10, 30.0)]:
+        delay = gigachat._retry_delay(httpx.Response(503), attempt)
+        assert base * 0.5 <= delay <= base * 1.5
+
+
+def test_token_expires_in(gigachat_client):
+    assert gigachat_client.token_expires_in() is None
+
+    gigachat_client._store_token({"access_token": "tok", "expires_in": 600})
+
+    assert gigachat_client.token_expires_in() == pytest.approx(600, abs=1)
+
+
+@pytest.mark.parametrize("expires_in, expected", [
+    (600.0, 480.0),         # 80% срока жизни
+    (10.0, 30.0),           # не чаще чем раз в 30 с
+    (None, 30.0),           # токена нет — пробуем скоро
+    (-5.0, 30.0),
+    (3600.0, 25 * 60.0),    # не реже чем раз в 25 мин
+])
+def test_token_refresh_delay_is_clamped(expires_in, expected):
+    assert _token_refresh_delay(expires_in) == pytest.approx(expected)
@@ -0,0 +1,27 @@
+import io
+
+import pytest
+
+from app.core.exceptions import FileTooLargeError
+from app.services.pipeline import _copy_upload_file
+
+
+def test_copy_upload_file_copies_from_start(tmp_path):
+    src = io.BytesIO(b"video-bytes")
+    src.seek(5)
+    dst = tmp_path / "video.mp4"
+
+    written = _copy_upload_file(src, dst, max_size_bytes=1024)
+
+    assert written == len(b"video-bytes")
+    assert dst.read_bytes() == b"video-bytes"
+
+
+def test_copy_upload_file_removes_partial_file_when_too_large(tmp_path):
+    src = io.BytesIO(b"x" * 2048)
+    dst = tmp_path / "video.mp4"
+
+    with pytest.raises(FileTooLargeError):
+        _copy_upload_file(src, dst, max_size_bytes=1024)
+
+    assert not dst.exists()